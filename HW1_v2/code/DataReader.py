@@ -1,11 +1,21 @@
+import os
+import sys
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from DigitsStore import open_archive
+from Dataset import Dataset
+
 """This script implements the functions for reading data.
 """
 
 def load_data(filename):
-    """Load a given txt file.
+    """Load a given .npz file.
+
+    The archive is decompressed once into a memory-mapped store (see
+    common/DigitsStore.py); the returned arrays are read-only views of it.
 
     Args:
         filename: A string.
@@ -15,10 +25,28 @@ def load_data(filename):
         labels : An array of shape [n_samples,].
 
     """
-    data = np.load(filename)
-    x = data['x']
-    y = data['y']
-    return x, y
+    data = open_archive(filename)
+    return data['x'], data['y']
+
+def iter_npy_shards(shards, chunk_size=65536):
+    """Stream (x, y) chunks from .npy shards without loading them into memory.
+
+    Each shard is opened as a read-only memory map, so only the rows of the
+    chunk being served are paged in.
+
+    Args:
+        shards: A list of (x_filename, y_filename) pairs of .npy files,
+            holding arrays of shape [n_i, n_features] and [n_i,].
+        chunk_size: An integer. Maximum number of rows per chunk.
+
+    Yields:
+        (x, y): Arrays of shape [chunk_size, n_features] and [chunk_size,].
+    """
+    for x_filename, y_filename in shards:
+        x = np.load(x_filename, mmap_mode='r')
+        y = np.load(y_filename, mmap_mode='r')
+        for start in range(0, x.shape[0], chunk_size):
+            yield x[start:start + chunk_size], y[start:start + chunk_size]
 
 def train_valid_split(raw_data, labels, split_index):
     """Split the original training data into a new training dataset
@@ -33,6 +61,63 @@ def train_valid_split(raw_data, labels, split_index):
     """
     return raw_data[:split_index], raw_data[split_index:], labels[:split_index], labels[split_index:]
 
+# Registered features, in registration order: name -> function mapping a
+# chunk of images of shape [chunk_size, 16, 16] to a column of shape [chunk_size,].
+FEATURES = dict()
+
+def register_feature(name):
+    """Decorator registering a feature function for extract_features."""
+    def register(function):
+        FEATURES[name] = function
+        return function
+    return register
+
+# Feature 1: Measure of Symmetry
+@register_feature('symmetry')
+def symmetry(raw_image):
+    return np.divide(-np.sum(np.absolute(raw_image - np.flip(raw_image, axis=-1)), axis=(1, -1)), 256)
+
+# Feature 2: Measure of Intensity
+@register_feature('intensity')
+def intensity(raw_image):
+    return np.divide(np.sum(raw_image, axis=(1, -1)), 256)
+
+# Feature 3: Bias Term. Always 1.
+@register_feature('bias')
+def bias(raw_image):
+    return np.ones(raw_image.shape[0])
+
+def extract_features(raw_X, features=('bias', 'symmetry', 'intensity'), out=None, chunk_size=4096):
+    """Extract registered features from raw_X chunk by chunk.
+
+    Every feature is computed on one chunk of images before moving to the
+    next, so temporaries are bounded by chunk_size rows and raw_X may be a
+    memory map larger than RAM.
+
+    Args:
+        raw_X: An array of shape [n_samples, 256].
+        features: A sequence of names of registered features, in column order.
+        out: None, an array of shape [n_samples, len(features)] to fill, or a
+            string naming a .npy file to create as a memory map.
+        chunk_size: An integer. Images processed at a time.
+
+    Returns:
+        X: An array of shape [n_samples, len(features)]; out if it was given.
+    """
+    n_samples = raw_X.shape[0]
+    shape = (n_samples, len(features))
+    if out is None:
+        out = np.empty(shape)
+    elif isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=np.float64, shape=shape)
+    functions = [FEATURES[name] for name in features]
+
+    for start in range(0, n_samples, chunk_size):
+        raw_image = np.asarray(raw_X[start:start + chunk_size]).reshape((-1, 16, 16))
+        for column, function in enumerate(functions):
+            out[start:start + raw_image.shape[0], column] = function(raw_image)
+    return out
+
 def prepare_X(raw_X):
     """Extract features from raw_X as required.
 
@@ -42,43 +127,45 @@ def prepare_X(raw_X):
     Returns:
         X: An array of shape [n_samples, n_features].
     """
-    raw_image = raw_X.reshape((-1, 16, 16))
+    # Stack features together in the following order.
+    # [Feature 3, Feature 1, Feature 2]
+    return extract_features(raw_X, ('bias', 'symmetry', 'intensity'))
 
-    # Feature 1: Measure of Symmetry
-    ### YOUR CODE HERE
+# Bump whenever prepare_X changes, so cached features computed by an older
+# version are not reused.
+FEATURES_VERSION = 1
 
-    feature_1 = np.divide(-np.sum(np.absolute(raw_image - np.flip(raw_image, axis=-1)), axis=(1, -1)), 256)
-    # print("shape of feature_1:", feature_1.shape)
-    # print("shape of raw_image:", raw_image.shape)
-    # print(feature_1)
-    ### END YOUR CODE
+def prepare_X_cached(raw_X, cache_dir="../cache"):
+    """prepare_X with an on-disk cache keyed by the contents of raw_X.
 
-    # Feature 2: Measure of Intensity
-    ### YOUR CODE HERE
-    feature_2 = np.divide(np.sum(raw_image, axis=(1, -1)), 256)
-    # print(feature_2)
-    ### END YOUR CODE
+    The key hashes the bytes, shape and dtype of raw_X together with
+    FEATURES_VERSION. On a hit the stored features are memory-mapped instead
+    of recomputed; on a miss they are computed once, streamed into the file
+    chunk by chunk, and the file is renamed into place atomically.
 
-    # Feature 3: Bias Term. Always 1.
-    ### YOUR CODE HERE
-    feature_3 = np.ones(raw_image.shape[0])
-    # print(feature_3)
-    ### END YOUR CODE
+    Args:
+        raw_X: An array of shape [n_samples, 256].
+        cache_dir: A string. Directory of the cached .npy files.
 
-    # Stack features together in the following order.
-    # [Feature 3, Feature 1, Feature 2]
-    ### YOUR CODE HERE
-    # print("1", feature_3.shape)
-    # print("2", feature_2.shape)
-    # print("3", feature_1.shape)
-    X = np.vstack([feature_3, feature_1, feature_2]).transpose()
-    # print("shape of X:", X.shape)
-    # print("first row of X", X[0, :])
-    # print("1", np.mean(feature_1))
-    # print("2", np.mean(feature_2))
-    # END YOUR CODE
-
-    return X
+    Returns:
+        X: A read-only array of shape [n_samples, n_features].
+    """
+    raw_X = np.ascontiguousarray(raw_X)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update("v{} {} {}".format(FEATURES_VERSION, raw_X.shape, raw_X.dtype.str).encode())
+    digest.update(memoryview(raw_X).cast('B'))
+    filename = os.path.join(cache_dir, "features-{}.npy".format(digest.hexdigest()))
+
+    if not os.path.exists(filename):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_filename = "{}.{}.tmp.npy".format(filename[:-len('.npy')], os.getpid())
+        # features are written chunk by chunk into the memory-mapped file,
+        # never held in RAM as a whole; same columns as prepare_X
+        X = extract_features(raw_X, ('bias', 'symmetry', 'intensity'), out=tmp_filename)
+        X.flush()
+        del X
+        os.replace(tmp_filename, filename)
+    return np.load(filename, mmap_mode='r')
 
 def prepare_y(raw_y):
     """
@@ -89,11 +176,10 @@ def prepare_y(raw_y):
         y: An array of shape [n_samples,].
         idx:return idx for data label 1 and 2.
     """
+    # Labels are stored as 0,1,2 already, so y is raw_y itself; it may be a
+    # read-only view of the dataset store and must not be written to.
     y = raw_y
     idx = np.where((raw_y==1) | (raw_y==2))
-    y[np.where(raw_y==0)] = 0
-    y[np.where(raw_y==1)] = 1
-    y[np.where(raw_y==2)] = 2
 
     return y, idx
 
@@ -0,0 +1,160 @@
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from LogisticRegression import logistic_regression
+from LRM import logistic_regression_multiclass
+from SharedArrays import SharedArrays, attach
+
+"""This script runs independent HW1 experiments, and k-fold
+cross-validation of HW1 classifiers, on a process pool.
+
+The prepared feature and label arrays are placed in shared memory once;
+workers attach to them by name instead of receiving a pickled copy.
+"""
+
+# name:     A string. Row label in the result table.
+# model:    'binary' (logistic_regression) or 'multiclass' (logistic_regression_multiclass).
+# params:   A dict of constructor arguments.
+# fit:      A string. Name of the fit_* method.
+# fit_args: A tuple of extra positional arguments for fit, e.g. (batch_size,).
+# train:    A (X_key, y_key) pair naming the shared arrays to train on.
+# evaluate: A dict mapping a split name to a (X_key, y_key) pair to score on.
+Experiment = namedtuple('Experiment', ['name', 'model', 'params', 'fit', 'fit_args', 'train', 'evaluate'])
+
+_MODELS = {
+    'binary': logistic_regression,
+    'multiclass': logistic_regression_multiclass,
+}
+
+# arrays attached in a worker process, keyed by name
+_shared_arrays = dict()
+
+
+def _attach(descriptors):
+    """Worker initializer: map the shared blocks as read-only arrays."""
+    _shared_arrays.update(attach(descriptors))
+
+
+def _run_experiment(experiment):
+    """Fit and score one experiment against the attached shared arrays.
+
+    Returns:
+        result: A dict with the experiment name, fitted parameters, the
+            number of epochs run and one score per evaluated split.
+    """
+    model = _MODELS[experiment.model](**experiment.params)
+    X_key, y_key = experiment.train
+    getattr(model, experiment.fit)(_shared_arrays[X_key], _shared_arrays[y_key], *experiment.fit_args)
+
+    result = {'name': experiment.name,
+              'params': model.get_params(),
+              'epochs': getattr(model, 'n_epochs', None)}
+    for split, (X_key, y_key) in experiment.evaluate.items():
+        result[split] = model.score(_shared_arrays[X_key], _shared_arrays[y_key])
+    return result
+
+
+def run_experiments(experiments, arrays, n_workers=None):
+    """Run experiments in parallel on a process pool.
+
+    Args:
+        experiments: A list of Experiment.
+        arrays: A dict mapping keys used by the experiments to arrays.
+        n_workers: An integer or None (one worker per CPU).
+
+    Returns:
+        results: A list of result dicts, in the order of experiments.
+    """
+    with SharedArrays(arrays) as shared:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_attach,
+                                 initargs=(shared.descriptors,)) as pool:
+            results = list(pool.map(_run_experiment, experiments))
+    return results
+
+
+def _run_fold(task):
+    """Fit one configuration on one cross-validation fold and score it on
+    the held-out part, using the attached shared 'X' and 'y'."""
+    config, train_idx, valid_idx = task
+    X = _shared_arrays['X']
+    y = _shared_arrays['y']
+    model = _MODELS[config['model']](**config['params'])
+    getattr(model, config['fit'])(X[train_idx], y[train_idx], *config.get('fit_args', ()))
+    return model.score(X[valid_idx], y[valid_idx])
+
+
+def k_fold_indices(n_samples, k, shuffle=True, seed=0):
+    """Split range(n_samples) into k folds.
+
+    Args:
+        n_samples: An integer.
+        k: An integer. Number of folds.
+        shuffle: A boolean. Shuffle the samples before splitting.
+        seed: An integer. Seed of the shuffle.
+
+    Returns:
+        folds: A list of k (train_idx, valid_idx) pairs of index arrays.
+    """
+    order = np.random.RandomState(seed).permutation(n_samples) if shuffle else np.arange(n_samples)
+    parts = np.array_split(order, k)
+    return [(np.concatenate(parts[:i] + parts[i + 1:]), parts[i]) for i in range(k)]
+
+
+def cross_validate(X, y, configs, k=5, n_workers=None, shuffle=True, seed=0):
+    """k-fold cross-validation of a grid of configurations, in parallel.
+
+    X and y are placed in shared memory once, so features computed by
+    prepare_X are shared by every fold; each (configuration, fold) pair is
+    one task on the process pool.
+
+    Args:
+        X: An array of shape [n_samples, n_features].
+        y: An array of shape [n_samples,].
+        configs: A list of dicts with keys 'name', 'model' ('binary' or
+            'multiclass'), 'params' (constructor arguments), 'fit' (name of
+            the fit_* method) and optionally 'fit_args' (e.g. (batch_size,)).
+        k: An integer. Number of folds.
+        n_workers: An integer or None (one worker per CPU).
+        shuffle: A boolean. Shuffle the samples before splitting.
+        seed: An integer. Seed of the shuffle.
+
+    Returns:
+        results: A list of dicts, one per configuration, with the keys
+            'name', 'fold_scores' (a list of k scores), 'mean' and 'std'.
+    """
+    folds = k_fold_indices(X.shape[0], k, shuffle, seed)
+    tasks = [(config, train_idx, valid_idx) for config in configs for train_idx, valid_idx in folds]
+
+    with SharedArrays({'X': X, 'y': y}) as shared:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_attach,
+                                 initargs=(shared.descriptors,)) as pool:
+            scores = list(pool.map(_run_fold, tasks))
+
+    results = list()
+    for idx, config in enumerate(configs):
+        fold_scores = scores[idx * k:(idx + 1) * k]
+        results.append({'name': config['name'],
+                        'fold_scores': fold_scores,
+                        'mean': np.mean(fold_scores),
+                        'std': np.std(fold_scores)})
+    return results
+
+
+def print_cv_results(results):
+    """Print cross-validation results, one row per configuration."""
+    print("{:<40s}{:>10s}{:>10s}   {}".format('configuration', 'mean', 'std', 'folds'))
+    for result in results:
+        print("{:<40s}{:>10.2f}{:>10.2f}   {}".format(result['name'], result['mean'], result['std'],
+                                                   ' '.join('{:.2f}'.format(s) for s in result['fold_scores'])))
+
+
+def print_results(results):
+    """Print the result table, one row per experiment."""
+    splits = list()
+    for result in results:
+        splits += [key for key in result if key not in ('name', 'params', 'epochs') and key not in splits]
+    print("{:<40s}{:>8s}".format('experiment', 'epochs') + ''.join('{:>10s}'.format(s) for s in splits))
+    for result in results:
+        print("{:<40s}{:>8}".format(result['name'], str(result['epochs']))
+              + ''.join('{:>10.2f}'.format(result[s]) if s in result else '{:>10s}'.format('-') for s in splits))
+        print("    params:", np.array2string(np.asarray(result['params']), precision=4).replace('\n', ' '))
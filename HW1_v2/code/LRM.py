@@ -8,16 +8,82 @@ Created on Fri Sep  6 12:00:48 2019
 
 import numpy as np
 import sys
+import time
+
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None
 
 """This script implements a two-class logistic regression model.
+
+X may also be a scipy.sparse CSR matrix in fit_miniBGD, partial_fit and the
+predict*/score methods.
 """
 
 class logistic_regression_multiclass(object):
 
-    def __init__(self, learning_rate, max_iter, k):
+    def __init__(self, learning_rate, max_iter, k, tol=None, patience=1, warm_start=False, dtype=np.float64,
+                 trace=False, callback=None, optimizer=None, schedule=None, objective='full', n_negatives=None, seed=0):
+        """
+        Args:
+            learning_rate: A float.
+            max_iter: An integer. Maximum number of epochs.
+            k: An integer. Number of classes.
+            tol: A float or None. Training stops once the norm of the epoch's
+                mean gradient stays below tol for patience consecutive epochs.
+                None always runs max_iter epochs.
+            patience: An integer.
+            warm_start: A boolean. If True, fit_miniBGD continues from the
+                current weights (e.g. set by assign_weights or a previous
+                fit) instead of resetting them to zeros.
+            dtype: A numpy float dtype. Weights, gradients and each batch are
+                computed in this dtype; np.float32 halves memory traffic.
+            trace: A boolean. If True, fit_* append one record per epoch to
+                self.training_trace (see _converged for the fields).
+            callback: A callable or None. Called with each epoch record.
+            optimizer: An Optimizers.Optimizer (e.g. Momentum, Adam) or None
+                for the plain step W <- W - learning_rate * gradient.
+            schedule: A callable or None. Maps the number of finished epochs
+                to a multiplier of learning_rate (e.g. Optimizers.StepDecay,
+                ExponentialDecay, CosineDecay).
+            objective: A string. Training objective:
+                'full': the softmax over all k classes.
+                'sampled': sampled softmax. Each mini-batch is normalized over
+                    its true classes plus n_negatives classes drawn uniformly
+                    without replacement, so a step costs O(n_negatives)
+                    instead of O(k) per example.
+                'hierarchical': hierarchical softmax on a balanced binary tree
+                    over the classes. W then holds the k-1 internal node
+                    vectors and a step costs O(log k) dot products per
+                    example, one per node on its class's path.
+                predict, score and the traced loss always use the exact,
+                fully normalized distribution of the trained model.
+            n_negatives: An integer. Negatives per mini-batch for 'sampled'.
+            seed: An integer. Seed of the negative sampler.
+        """
         self.learning_rate = learning_rate
         self.max_iter = max_iter
-        self.k = k 
+        self.k = k
+        self.tol = tol
+        self.patience = patience
+        self.warm_start = warm_start
+        self.dtype = np.dtype(dtype)
+        self.trace = trace
+        self.callback = callback
+        self.optimizer = optimizer
+        self.schedule = schedule
+        self.objective = objective
+        self.n_negatives = n_negatives
+        self.seed = seed
+        if objective not in ('full', 'sampled', 'hierarchical'):
+            raise ValueError("objective must be 'full', 'sampled' or 'hierarchical'")
+        if objective == 'sampled' and not n_negatives:
+            raise ValueError("objective 'sampled' needs n_negatives")
+        if objective == 'hierarchical':
+            self._path_nodes, self._path_signs = _class_tree_paths(k)
+        self._rng = np.random.default_rng(seed)
+        self.W = None
         
     def fit_miniBGD(self, X, labels, batch_size):
         """Train perceptron model on data (X,y) with mini-Batch GD.
@@ -30,53 +96,215 @@ class logistic_regression_multiclass(object):
         Returns:
             self: Returns an instance of self.
 
-        Hint: the labels should be converted to one-hot vectors, for example: 1----> [0,1,0]; 2---->[0,0,1].
+        The labels are used as integer class indices; the equivalent one-hot
+        matrix (1----> [0,1,0]; 2---->[0,0,1]) is never materialized.
         """
 
         ### YOUR CODE HERE
         n_samples, n_features = X.shape
-        n_classes = self.k
-        
-        y = np.zeros([n_samples, n_classes])
-        
-        for idx, label in enumerate(labels):
-            # Currently the type of 'label' is float. Type of 'label' should be converted to int
-            label = int(label)
-            y[idx, label] = 1
-        
+        if _issparse(X):
+            X = X.tocsr()
+
+        y = self._class_indices(labels)
+
         # We should have weights for each class.
-        self.W = np.zeros([n_classes, n_features])
+        self._init_weights(n_features, self.warm_start)
         # all_gradients = list()
+        self._reset_convergence()
 
         for _ in range(self.max_iter):
-            for global_idx in range(0, n_samples, batch_size):
-                # reset gradient for every batch
-                gradient_acc = list()
-
-                # global_idx: index in terms of all samples
-                if global_idx + batch_size > n_samples:
-                    samples_size = n_samples - global_idx
-                else:
-                    samples_size = batch_size 
-                
-                # local_idx: index in terms of samples in the batch
-                for local_idx in range(global_idx, global_idx + samples_size):
-                    gradient_acc.append(self._gradient(X[local_idx], y[local_idx]))
-                batch_gradient = np.mean(gradient_acc, axis=0)
-                
-                self.W = self.W + self.learning_rate * (-batch_gradient)
-
-                # all_gradients.append(batch_gradient)
+            if self._converged(self._epoch_miniBGD(X, y, batch_size), X, y):
+                break
 
         # print("All gradients in Multi:", all_gradients)
 
         return self
         ### END YOUR CODE
-    
+
+    def partial_fit(self, X, labels, batch_size=None):
+        """Run one epoch of mini-batch GD on (X, labels), starting from the
+        current weights (zeros if the model was never fitted).
+
+        Repeated calls absorb new data incrementally; each call appends one
+        entry to gradient_norms and increments n_epochs.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            labels: An array of shape [n_samples,].  Only contains 0,..,k-1.
+            batch_size: An integer or None (one full batch).
+
+        Returns:
+            self: Returns an instance of self.
+        """
+        n_samples, n_features = X.shape
+        if _issparse(X):
+            X = X.tocsr()
+
+        y = self._class_indices(labels)
+
+        self._init_weights(n_features, True)
+        if not hasattr(self, 'gradient_norms'):
+            self._reset_convergence()
+        self._epoch_start = time.perf_counter()
+        self._converged(self._epoch_miniBGD(X, y, batch_size or n_samples), X, y)
+        return self
+
+    def _epoch_miniBGD(self, X, y, batch_size):
+        """Run one epoch of mini-batch GD over (X, y) with class indices y.
+
+        Returns:
+            epoch_gradient: An array of shape [k, n_features]. The mean of
+                the gradients applied during the epoch.
+        """
+        n_samples = X.shape[0]
+        is_sparse = _issparse(X)
+        epoch_gradient = np.zeros_like(self.W)
+        for global_idx in range(0, n_samples, batch_size):
+            # global_idx: index in terms of all samples
+            if global_idx + batch_size > n_samples:
+                samples_size = n_samples - global_idx
+            else:
+                samples_size = batch_size
+
+            X_batch = X[global_idx:global_idx + samples_size]
+            if is_sparse:
+                X_batch = X_batch.astype(self.dtype, copy=False)
+            else:
+                X_batch = np.asarray(X_batch, dtype=self.dtype)
+            y_batch = y[global_idx:global_idx + samples_size]
+            if self.objective == 'sampled':
+                rows, batch_gradient = self._sampled_batch_gradient(X_batch, y_batch)
+            elif self.objective == 'hierarchical':
+                rows, batch_gradient = self._hierarchical_batch_gradient(X_batch, y_batch)
+            else:
+                rows, batch_gradient = slice(None), self._batch_gradient(X_batch, y_batch)
+
+            # only the rows of W touched by the batch are updated
+            self._apply_gradient(batch_gradient, rows)
+            epoch_gradient[rows] += batch_gradient * samples_size
+
+            # all_gradients.append(batch_gradient)
+        return epoch_gradient / n_samples
+
+    def _class_indices(self, labels):
+        """Convert labels to integer class indices.
+
+        Args:
+            labels: An array of shape [n_samples,].  Only contains 0,..,k-1.
+
+        Returns:
+            y: An integer array of shape [n_samples,].
+        """
+        # Currently the type of 'label' is float. Type of 'label' should be converted to int
+        y = np.asarray(labels).astype(np.intp)
+        if y.size and (y.min() < 0 or y.max() >= self.k):
+            raise ValueError("labels must be in 0,..,{}".format(self.k - 1))
+        return y
+
+    def _init_weights(self, n_features, warm_start):
+        """Set self.W to zeros, or keep the current weights if warm_start.
+
+        Args:
+            n_features: An integer.
+            warm_start: A boolean.
+        """
+        # hierarchical softmax keeps one vector per internal node of the class tree
+        n_rows = self.k - 1 if self.objective == 'hierarchical' else self.k
+        if warm_start and self.W is not None:
+            self.W = np.reshape(np.array(self.W, dtype=self.dtype), [n_rows, n_features])
+        else:
+            self.W = np.zeros([n_rows, n_features], dtype=self.dtype)
+            if self.optimizer is not None:
+                self.optimizer.reset()
+            # a cold start replays the negatives of the first fit; warm
+            # starts (e.g. partial_fit) continue the sequence
+            self._rng = np.random.default_rng(self.seed)
+
+    def _apply_gradient(self, gradient, rows):
+        """Take one step of self.optimizer (plain gradient step if None) on
+        the rows of W the gradient is for, with the scheduled learning rate.
+
+        Args:
+            gradient: An array with the shape of self.W[rows].
+            rows: A slice or an integer array.
+        """
+        learning_rate = self.learning_rate
+        if self.schedule is not None:
+            learning_rate = learning_rate * self.schedule(self.n_epochs)
+        if self.optimizer is None:
+            self.W[rows] = self.W[rows] + learning_rate * (-gradient)
+        else:
+            self.optimizer.step(self.W, gradient, learning_rate, rows)
+
+    def _loss(self, X, y):
+        """Compute the mean cross-entropy of self.W on (X, y).
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            y: An integer array of shape [n_samples,]. Class indices.
+
+        Returns:
+            loss: A float.
+        """
+        log_p = self._log_proba(X)
+        # gather the log-probability of the true class of each row
+        return -np.mean(log_p[np.arange(X.shape[0]), y])
+
+    def _reset_convergence(self):
+        """Clear the convergence bookkeeping before a new fit_* run."""
+        self.n_epochs = 0
+        self.gradient_norms = list()
+        self.training_trace = list()
+        self._epochs_below_tol = 0
+        self._epoch_start = time.perf_counter()
+
+    def _converged(self, epoch_gradient, X=None, y=None):
+        """Record one finished epoch and check the stopping criterion.
+
+        If tracing is on (self.trace or self.callback), also builds a record
+        with the fields epoch, time (wall seconds of the epoch),
+        samples_per_sec, loss (mean cross-entropy on (X, y) after the epoch),
+        gradient_norm and weight_norm. It is appended to self.training_trace
+        if self.trace and passed to self.callback.
+
+        Args:
+            epoch_gradient: An array of shape [k, n_features]. The mean of the
+                gradients applied during the epoch.
+            X: An array of shape [n_samples, n_features]. The epoch's data.
+            y: An integer array of shape [n_samples,]. Class indices.
+
+        Returns:
+            converged: A boolean. True once the gradient norm has stayed below
+                self.tol for self.patience consecutive epochs.
+        """
+        gradient_norm = np.linalg.norm(epoch_gradient)
+        self.n_epochs += 1
+        self.gradient_norms.append(gradient_norm)
+        if self.trace or self.callback is not None:
+            elapsed = time.perf_counter() - self._epoch_start
+            record = {'epoch': self.n_epochs,
+                      'time': elapsed,
+                      'samples_per_sec': X.shape[0] / elapsed if elapsed > 0 else float('inf'),
+                      'loss': float(self._loss(X, y)),
+                      'gradient_norm': float(gradient_norm),
+                      'weight_norm': float(np.linalg.norm(self.W))}
+            if self.trace:
+                self.training_trace.append(record)
+            if self.callback is not None:
+                self.callback(record)
+            self._epoch_start = time.perf_counter()
+        if self.tol is None:
+            return False
+        if gradient_norm < self.tol:
+            self._epochs_below_tol += 1
+        else:
+            self._epochs_below_tol = 0
+        return self._epochs_below_tol >= self.patience
 
     def _gradient(self, _x, _y):
         """Compute the gradient of cross-entropy with respect to self.W
-        for one training sample (_x, _y). This function is used in fit_*.
+        for one training sample (_x, _y). Per-sample reference version of
+        _batch_gradient; not used in training.
 
         Args:
             _x: An array of shape [n_features,].
@@ -97,12 +325,128 @@ class logistic_regression_multiclass(object):
         return _g
         ### END YOUR CODE
     
+    def _batch_gradient(self, X, y):
+        """Compute the mean gradient of cross-entropy with respect to self.W
+        over a batch (X, y) with one matrix product. Equivalent to averaging
+        _gradient over the rows of X. For a CSR batch only the non-zeros of X
+        are touched.
+
+        Args:
+            X: An array or CSR matrix of shape [batch_size, n_features].
+            y: An integer array of shape [batch_size,]. Class indices.
+
+        Returns:
+            _g: An array of shape [k, n_features]. The mean gradient of
+                cross-entropy with respect to self.W.
+        """
+        # p - one_hot(y), formed by subtracting 1 at the true-class entries
+        delta = np.exp(_log_softmax(X @ self.W.T))
+        delta[np.arange(X.shape[0]), y] -= 1
+        # (X.T @ delta).T rather than delta.T @ X so CSR input stays a sparse product
+        _g = (X.T @ delta).T / X.shape[0]
+        return _g
+
+    def _sampled_batch_gradient(self, X, y):
+        """Sampled-softmax gradient for a batch (X, y).
+
+        The softmax is normalized over the classes occurring in y plus
+        self.n_negatives other classes drawn uniformly without replacement,
+        shared by the whole batch.
+
+        Args:
+            X: An array or CSR matrix of shape [batch_size, n_features].
+            y: An integer array of shape [batch_size,]. Class indices.
+
+        Returns:
+            rows: An integer array of shape [n_candidates,]. Rows of W the
+                gradient applies to.
+            _g: An array of shape [n_candidates, n_features].
+        """
+        positives, y_local = np.unique(y, return_inverse=True)
+        # draw among the k - n_positives other classes directly: Generator.choice
+        # without replacement samples small draws without permuting all k
+        # classes, then each draw d is shifted past the positives <= it
+        n_others = self.k - positives.shape[0]
+        draw = self._rng.choice(n_others, size=min(self.n_negatives, n_others), replace=False)
+        negatives = draw + np.searchsorted(positives - np.arange(positives.shape[0]), draw, side='right')
+        rows = np.concatenate([positives, negatives])
+
+        delta = np.exp(_log_softmax(X @ self.W[rows].T))
+        delta[np.arange(X.shape[0]), y_local] -= 1
+        _g = (X.T @ delta).T / X.shape[0]
+        return rows, _g
+
+    def _hierarchical_batch_gradient(self, X, y):
+        """Hierarchical-softmax gradient for a batch (X, y).
+
+        log p(c|x) is the sum of log sigmoid(sign * W[node].x) over the nodes
+        on the path from the root of the class tree to leaf c.
+
+        Args:
+            X: An array or CSR matrix of shape [batch_size, n_features].
+            y: An integer array of shape [batch_size,]. Class indices.
+
+        Returns:
+            rows: An integer array of shape [n_nodes,]. Internal nodes on the
+                paths of the batch, i.e. rows of W the gradient applies to.
+            _g: An array of shape [n_nodes, n_features].
+        """
+        n_samples = X.shape[0]
+        nodes = self._path_nodes[y]
+        signs = self._path_signs[y].astype(self.dtype)
+
+        # z[n, d] = W[nodes[n, d]].x_n: only the nodes on each example's own
+        # path, O(depth * n_features) per example
+        if _issparse(X):
+            # X.multiply(rows) keeps only the non-zeros of each x_n
+            sample_idx = np.repeat(np.arange(n_samples), nodes.shape[1])
+            z = np.asarray(X[sample_idx].multiply(self.W[nodes.ravel()]).sum(axis=1)).reshape(nodes.shape)
+        else:
+            z = np.matmul(self.W[nodes], X[:, :, None])[:, :, 0]
+        # d/dz of -log sigmoid(sign * z) is -sign * sigmoid(-sign * z); padding has sign 0
+        coef = -signs * np.exp(-np.logaddexp(0, signs * z))
+
+        # gradient of node r: sum of coef[n, d] * x_n over the entries at r
+        rows, local = np.unique(nodes, return_inverse=True)
+        local = local.reshape(nodes.shape)
+        if sparse is not None:
+            # [n_nodes, batch_size] scatter matrix with one entry per (example, depth)
+            sample_idx = np.repeat(np.arange(n_samples), nodes.shape[1])
+            scatter = sparse.csr_matrix((coef.ravel(), (local.ravel(), sample_idx)),
+                                        shape=(rows.shape[0], n_samples))
+            _g = scatter @ X
+            _g = _g.toarray() if _issparse(_g) else np.asarray(_g)
+        else:
+            _g = np.zeros([rows.shape[0], X.shape[1]], dtype=self.dtype)
+            for d in range(nodes.shape[1]):
+                np.add.at(_g, local[:, d], coef[:, d, None] * X)
+        _g = (_g / n_samples).astype(self.dtype, copy=False)
+        return rows, _g
+
+    def _log_proba(self, X):
+        """Exact log-probabilities of all k classes for the rows of X.
+
+        Args:
+            X: An array or CSR matrix of shape [n_samples, n_features].
+
+        Returns:
+            log_p: An array of shape [n_samples, k].
+        """
+        if self.objective != 'hierarchical':
+            return _log_softmax(X @ self.W.T)
+        node_logits = X @ self.W.T
+        # [n_samples, k, depth]; padded path entries have sign 0 and add log(1)*0
+        z = node_logits[:, self._path_nodes] * self._path_signs
+        return np.sum(-np.logaddexp(0, -z) * (self._path_signs != 0), axis=2)
+
     def softmax(self, x):
         """Compute softmax values for each sets of scores in x."""
         ### You must implement softmax by youself, otherwise you will not get credits for this part.
 
         ### YOUR CODE HERE
-        return np.divide(np.exp(x), np.sum(np.exp(x)))
+        # shifting by max(x) leaves the result unchanged and keeps np.exp from overflowing
+        exp_x = np.exp(x - np.max(x))
+        return np.divide(exp_x, np.sum(exp_x))
         ### END YOUR CODE
     
     def get_params(self):
@@ -116,41 +460,157 @@ class logistic_regression_multiclass(object):
             sys.exit(-1)
         return self.W
 
+    def assign_weights(self, weights):
+        self.W = weights
+        return self
+
 
-    def predict(self, X):
+    def predict(self, X, chunk_size=None):
         """Predict class labels for samples in X.
 
         Args:
             X: An array of shape [n_samples, n_features].
+            chunk_size: An integer or None. Rows scored at a time; None picks
+                a size that keeps each chunk's temporaries around 4M entries.
 
         Returns:
             preds: An array of shape [n_samples,]. Only contains 0,..,k-1.
         """
         ### YOUR CODE HERE
-        prediction_probabilities = list()
-        for idx in range(X.shape[0]):
-            prediction_probability = self.softmax(self.W @ X[idx])
-            prediction_probabilities.append(prediction_probability)
-        
-        preds = np.argmax(prediction_probabilities, axis=1)
+        preds = np.empty(X.shape[0], dtype=np.intp)
+        for start, scores in self._score_chunks(X, chunk_size, normalize=False):
+            preds[start:start + scores.shape[0]] = np.argmax(scores, axis=1)
         return preds
         ### END YOUR CODE
 
+    def predict_proba(self, X, chunk_size=None):
+        """Predict the probability of every class for samples in X.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            chunk_size: An integer or None, as in predict.
+
+        Returns:
+            preds_proba: An array of shape [n_samples, k]. Rows sum to 1.
+        """
+        preds_proba = np.empty([X.shape[0], self.k], dtype=self.dtype)
+        for start, log_p in self._score_chunks(X, chunk_size):
+            preds_proba[start:start + log_p.shape[0]] = np.exp(log_p)
+        return preds_proba
+
+    def predict_topk(self, X, k, chunk_size=None):
+        """Predict the k most probable classes for samples in X.
+
+        The top k of each row are found with np.argpartition, which is linear
+        in the number of classes; only those k entries are then sorted.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            k: An integer. Number of classes to return per sample.
+            chunk_size: An integer or None, as in predict.
+
+        Returns:
+            classes: An array of shape [n_samples, k]. Class indices, most
+                probable first.
+            probabilities: An array of shape [n_samples, k]. Their probabilities.
+        """
+        k = min(k, self.k)
+        classes = np.empty([X.shape[0], k], dtype=np.intp)
+        probabilities = np.empty([X.shape[0], k], dtype=self.dtype)
+        for start, log_p in self._score_chunks(X, chunk_size):
+            rows = np.arange(log_p.shape[0])[:, None]
+            top = np.argpartition(-log_p, k - 1, axis=1)[:, :k]
+            top = np.take_along_axis(top, np.argsort(-log_p[rows, top], axis=1), axis=1)
+            classes[start:start + log_p.shape[0]] = top
+            probabilities[start:start + log_p.shape[0]] = np.exp(log_p[rows, top])
+        return classes, probabilities
+
+    def _score_chunks(self, X, chunk_size, normalize=True):
+        """Compute class scores for the rows of X, chunk_size rows at a time.
+
+        Args:
+            X: An array or CSR matrix of shape [n_samples, n_features].
+            chunk_size: An integer or None, as in predict.
+            normalize: A boolean. If False and the model is a flat softmax,
+                yield the raw logits, which have the same argmax.
+
+        Yields:
+            (start, scores): The index of the chunk's first row and an array
+                of shape [chunk_size, k] of exact log-probabilities (or logits).
+        """
+        if _issparse(X):
+            X = X.tocsr()
+        if chunk_size is None:
+            # the [chunk, k, depth] temporary of the tree model is the largest one
+            width = self.k * (self._path_nodes.shape[1] if self.objective == 'hierarchical' else 1)
+            chunk_size = max(1, 2 ** 22 // width)
+        for start in range(0, X.shape[0], chunk_size):
+            X_chunk = X[start:start + chunk_size]
+            if not _issparse(X_chunk):
+                X_chunk = np.asarray(X_chunk, dtype=self.dtype)
+            if normalize or self.objective == 'hierarchical':
+                yield start, self._log_proba(X_chunk)
+            else:
+                yield start, X_chunk @ self.W.T
 
-    def score(self, X, labels):
+    def score(self, X, labels, chunk_size=None):
         """Returns the mean accuracy on the given test data and labels.
 
         Args:
             X: An array of shape [n_samples, n_features].
             labels: An array of shape [n_samples,]. Only contains 0,..,k-1.
+            chunk_size: An integer or None, as in predict.
 
         Returns:
             score: An float. Mean accuracy of self.predict(X) wrt. labels.
         """
         ### YOUR CODE HERE
-        prediction = self.predict(X)
+        prediction = self.predict(X, chunk_size)
         score = np.divide(np.sum(labels == prediction), X.shape[0]) * 100
         return score
 
         ### END YOUR CODE
 
+
+def _issparse(X):
+    """Return True if X is a scipy.sparse matrix (False without scipy)."""
+    return sparse is not None and sparse.issparse(X)
+
+
+def _log_softmax(logits):
+    """Row-wise log-softmax of logits of shape [n_samples, k], using the
+    log-sum-exp trick so that np.exp never overflows."""
+    logits = logits - np.max(logits, axis=1, keepdims=True)
+    return logits - np.log(np.sum(np.exp(logits), axis=1, keepdims=True))
+
+
+def _class_tree_paths(k):
+    """Root-to-leaf paths of a balanced binary tree over k classes.
+
+    Internal nodes are numbered 0,..,k-2 in heap order (children of node i
+    are 2i+1 and 2i+2) and class c is the leaf k-1+c.
+
+    Returns:
+        nodes: An integer array of shape [k, depth]. Internal nodes on the
+            path of each class, padded with 0.
+        signs: An array of shape [k, depth]. +1 when the path goes to the
+            left child, -1 to the right child, 0 for padding.
+    """
+    if k < 2:
+        raise ValueError("hierarchical softmax needs k >= 2")
+    paths = list()
+    for c in range(k):
+        node, path = k - 1 + c, list()
+        while node > 0:
+            parent = (node - 1) // 2
+            path.append((parent, 1 if node == 2 * parent + 1 else -1))
+            node = parent
+        paths.append(path[::-1])
+    depth = max(len(path) for path in paths)
+    nodes = np.zeros([k, depth], dtype=np.intp)
+    signs = np.zeros([k, depth])
+    for c, path in enumerate(paths):
+        for d, (node, sign) in enumerate(path):
+            nodes[c, d] = node
+            signs[c, d] = sign
+    return nodes, signs
@@ -1,15 +1,59 @@
 import numpy as np
+import math
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from SharedArrays import SharedArrays, attach
+
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None
 
 """This script implements a two-class logistic regression model.
+
+Wherever X is an array of shape [n_samples, n_features], a scipy.sparse CSR
+matrix of that shape is accepted too; the kernels then only touch non-zeros.
 """
 
 
 class logistic_regression(object):
 
-    def __init__(self, learning_rate, max_iter):
+    def __init__(self, learning_rate, max_iter, tol=None, patience=1, warm_start=False, dtype=np.float64,
+                 trace=False, callback=None, optimizer=None, schedule=None):
+        """
+        Args:
+            learning_rate: A float.
+            max_iter: An integer. Maximum number of epochs.
+            tol: A float or None. Training stops once the norm of the epoch's
+                mean gradient stays below tol for patience consecutive epochs.
+                None always runs max_iter epochs.
+            patience: An integer.
+            warm_start: A boolean. If True, fit_* continue from the current
+                weights (e.g. set by assign_weights or a previous fit)
+                instead of resetting them to zeros.
+            dtype: A numpy float dtype. Weights, gradients and each batch are
+                computed in this dtype; np.float32 halves memory traffic.
+            trace: A boolean. If True, fit_* append one record per epoch to
+                self.training_trace (see _converged for the fields).
+            callback: A callable or None. Called with each epoch record.
+            optimizer: An Optimizers.Optimizer (e.g. Momentum, Adam) or None
+                for the plain step W <- W - learning_rate * gradient.
+            schedule: A callable or None. Maps the number of finished epochs
+                to a multiplier of learning_rate (e.g. Optimizers.StepDecay,
+                ExponentialDecay, CosineDecay).
+        """
         self.learning_rate = learning_rate
         self.max_iter = max_iter
+        self.tol = tol
+        self.patience = patience
+        self.warm_start = warm_start
+        self.dtype = np.dtype(dtype)
+        self.trace = trace
+        self.callback = callback
+        self.optimizer = optimizer
+        self.schedule = schedule
+        self.W = None
 
     def fit_BGD(self, X, y):
         """Train perceptron model on data (X,y) with Batch Gradient Descent.
@@ -27,10 +71,13 @@ class logistic_regression(object):
         # define W
         # shape of _x: [n_features,]
         # shape of  W: [n_features,]
-        self.W = np.zeros([1, n_features])
+        self._init_weights(n_features, self.warm_start)
+        self._reset_convergence()
         for _ in range(self.max_iter):
-            full_gradient = np.mean([self._gradient(x, y) for x, y in zip(X, y)], axis=0)
-            self.W = self.W + self.learning_rate * (-full_gradient)
+            full_gradient = self._batch_gradient(X, y)
+            self._apply_gradient(full_gradient)
+            if self._converged(full_gradient, X, y):
+                break
 
         ### END YOUR CODE
         return self
@@ -49,19 +96,13 @@ class logistic_regression(object):
         ### YOUR CODE HERE
         n_samples, n_features = X.shape
 
-        self.W = np.zeros([1, n_features])
+        self._init_weights(n_features, self.warm_start)
         # all_gradients = list()
+        self._reset_convergence()
 
         for _ in range(self.max_iter):
-            for global_idx in range(0, n_samples, batch_size):
-                if global_idx + batch_size > n_samples:
-                    samples_size = n_samples - global_idx
-                else:
-                    samples_size = batch_size
-                    
-                batch_gradient = np.mean(
-                    [self._gradient(x, y) for x, y in zip(X[global_idx:global_idx + samples_size], y[global_idx:global_idx + samples_size])], axis=0)
-                self.W = self.W + self.learning_rate * (-batch_gradient)
+            if self._converged(self._epoch_miniBGD(X, y, batch_size), X, y):
+                break
 
         #         all_gradients.append(batch_gradient)
         #
@@ -83,17 +124,375 @@ class logistic_regression(object):
         ### YOUR CODE HERE
         n_samples, n_features = X.shape
 
-        self.W = np.zeros([1, n_features])
+        self._init_weights(n_features, self.warm_start)
+        self._reset_convergence()
         for _ in range(self.max_iter):
+            epoch_gradient = 0
             for j in range(n_samples):
-                one_sample_gradient = self._gradient(X[j], y[j])
-                self.W = self.W + self.learning_rate * (-one_sample_gradient)
+                one_sample_gradient = self._batch_gradient(X[j:j + 1], y[j:j + 1])
+                self._apply_gradient(one_sample_gradient)
+                epoch_gradient = epoch_gradient + one_sample_gradient
+            if self._converged(epoch_gradient / n_samples, X, y):
+                break
         ### END YOUR CODE
         return self
 
+    def fit_hogwild(self, X, y, n_workers=4):
+        """Train perceptron model on data (X,y) with lock-free parallel SGD
+        (Hogwild!).
+
+        X is cut into n_workers contiguous shards. Each epoch, one worker
+        process per shard runs fit_SGD's per-sample update over its shard,
+        writing into W in a shared memory block in place without any locking.
+        Updates of different workers may interleave; with few features and
+        small steps this converges like serial fit_SGD. n_workers=1 reproduces
+        fit_SGD.
+
+        Workers are processes rather than threads: each per-sample step is
+        Python-level work on a tiny vector and holds the GIL, so threads would
+        take turns instead of running together. Speedup therefore needs as
+        many free cores as workers, and shards large enough to amortize the
+        per-epoch dispatch; see benchmark_hogwild in main.py.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            y: An array of shape [n_samples,]. Only contains 1 or -1.
+            n_workers: An integer. Number of worker processes.
+
+        Returns:
+            self: Returns an instance of self.
+        """
+        if self.optimizer is not None:
+            # per-step optimizer state (moments, step count) would be
+            # read-modify-written by all workers at once and silently corrupted
+            raise ValueError("fit_hogwild only supports plain gradient steps (optimizer=None).")
+        X = _as_matrix(X, self.dtype)
+        y = np.asarray(y, dtype=self.dtype)
+        n_samples, n_features = X.shape
+
+        self._init_weights(n_features, self.warm_start)
+        self._reset_convergence()
+        bounds = np.linspace(0, n_samples, n_workers + 1).astype(int)
+        shards = list(zip(bounds[:-1], bounds[1:]))
+
+        arrays = {'y': y, 'W': self.W}
+        if not _issparse(X):
+            arrays['X'] = X
+        with SharedArrays(arrays) as shared:
+            # the model trains on the shared W; workers see every update
+            self.W = shared.array('W')
+            initargs = (shared.descriptors, self.dtype, X if _issparse(X) else None)
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_hogwild_attach,
+                                     initargs=initargs) as pool:
+                for _ in range(self.max_iter):
+                    learning_rate = self._scheduled_learning_rate()
+                    tasks = [(start, end, learning_rate) for start, end in shards]
+                    epoch_gradient = sum(pool.map(_hogwild_shard, tasks))
+                    if self._converged(epoch_gradient / n_samples, X, y):
+                        break
+            # copy out before the block is released
+            self.W = np.array(self.W)
+
+        return self
+
+    def fit_stream(self, batches, batch_size):
+        """Train perceptron model with mini-Batch Gradient Descent on data
+        streamed in (X, y) chunks, without holding the full dataset in memory.
+
+        Chunks are re-cut into mini-batches of batch_size rows, so the updates
+        are the same as fit_miniBGD on the concatenation of all chunks.
+
+        Args:
+            batches: A callable returning an iterable of (X, y) chunks, called
+                once per epoch (e.g. lambda: iter_npy_shards(shards)), or an
+                iterable of chunks. A one-shot iterator only supports one epoch.
+            batch_size: An integer.
+
+        Returns:
+            self: Returns an instance of self.
+        """
+        initialized = False
+        self._reset_convergence()
+
+        for _ in range(self.max_iter):
+            chunks = batches() if callable(batches) else batches
+            epoch_gradient, n_samples = 0, 0
+            for X_batch, y_batch in _rebatch(chunks, batch_size):
+                if not initialized:
+                    self._init_weights(X_batch.shape[1], self.warm_start)
+                    initialized = True
+                batch_gradient = self._batch_gradient(X_batch, y_batch)
+                self._apply_gradient(batch_gradient)
+                epoch_gradient = epoch_gradient + batch_gradient * X_batch.shape[0]
+                n_samples += X_batch.shape[0]
+            if n_samples == 0 or self._converged(epoch_gradient / n_samples, n_samples=n_samples):
+                break
+            if iter(chunks) is chunks and not callable(batches):
+                # a plain iterator is exhausted after one pass
+                break
+
+        return self
+
+    def fit_newton(self, X, y):
+        """Train perceptron model on data (X,y) with Newton's method (IRLS).
+
+        Each iteration solves H d = g with the full-batch gradient g and the
+        Hessian H of the mean cross-entropy, and updates W <- W - d. The
+        learning_rate is not used. Stops on self.tol like fit_BGD.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            y: An array of shape [n_samples,]. Only contains 1 or -1.
+
+        Returns:
+            self: Returns an instance of self.
+        """
+        n_samples, n_features = X.shape
+
+        self._init_weights(n_features, self.warm_start)
+        self._reset_convergence()
+        for _ in range(self.max_iter):
+            full_gradient = self._batch_gradient(X, y)
+            if self._converged(full_gradient, X, y):
+                break
+            step = np.linalg.solve(self._hessian(X), full_gradient[0])
+            self.W = self.W - step
+
+        return self
+
+    def fit_lbfgs(self, X, y, memory=10):
+        """Train perceptron model on data (X,y) with L-BFGS.
+
+        The search direction comes from the two-loop recursion over the last
+        memory curvature pairs, and the step length from a backtracking line
+        search on the cross-entropy. The learning_rate is not used. Stops on
+        self.tol like fit_BGD.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            y: An array of shape [n_samples,]. Only contains 1 or -1.
+            memory: An integer. Number of (s, g) pairs kept.
+
+        Returns:
+            self: Returns an instance of self.
+        """
+        n_samples, n_features = X.shape
+
+        self._init_weights(n_features, self.warm_start)
+        self._reset_convergence()
+        s_list, g_list = list(), list()
+        loss = self._loss(X, y)
+        gradient = self._batch_gradient(X, y)[0]
+        for _ in range(self.max_iter):
+            if self._converged(gradient, X, y):
+                break
+
+            # two-loop recursion: direction = -H_k * gradient
+            q = gradient.copy()
+            alphas = list()
+            for s_k, g_k in reversed(list(zip(s_list, g_list))):
+                alpha = np.dot(s_k, q) / np.dot(g_k, s_k)
+                q = q - alpha * g_k
+                alphas.append(alpha)
+            if s_list:
+                q = q * np.dot(s_list[-1], g_list[-1]) / np.dot(g_list[-1], g_list[-1])
+            for (s_k, g_k), alpha in zip(zip(s_list, g_list), reversed(alphas)):
+                beta = np.dot(g_k, q) / np.dot(g_k, s_k)
+                q = q + s_k * (alpha - beta)
+            direction = -q
+
+            # backtracking line search with the Armijo condition
+            W_old = self.W
+            step = 1.0
+            slope = np.dot(gradient, direction)
+            while True:
+                self.W = W_old + step * direction
+                new_loss = self._loss(X, y)
+                if new_loss <= loss + 1e-4 * step * slope or step < 1e-10:
+                    break
+                step = step * 0.5
+
+            new_gradient = self._batch_gradient(X, y)[0]
+            s_k = (self.W - W_old)[0]
+            g_k = new_gradient - gradient
+            if np.dot(s_k, g_k) > 1e-12:
+                s_list.append(s_k)
+                g_list.append(g_k)
+                if len(s_list) > memory:
+                    s_list.pop(0)
+                    g_list.pop(0)
+            loss, gradient = new_loss, new_gradient
+
+        return self
+
+    def partial_fit(self, X, y, batch_size=None):
+        """Run one epoch of mini-Batch Gradient Descent on (X, y), starting
+        from the current weights (zeros if the model was never fitted).
+
+        Repeated calls absorb new data incrementally; each call appends one
+        entry to gradient_norms and increments n_epochs.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            y: An array of shape [n_samples,]. Only contains 1 or -1.
+            batch_size: An integer or None (one full batch).
+
+        Returns:
+            self: Returns an instance of self.
+        """
+        n_samples, n_features = X.shape
+
+        self._init_weights(n_features, True)
+        if not hasattr(self, 'gradient_norms'):
+            self._reset_convergence()
+        self._epoch_start = time.perf_counter()
+        self._converged(self._epoch_miniBGD(X, y, batch_size or n_samples), X, y)
+        return self
+
+    def _epoch_miniBGD(self, X, y, batch_size):
+        """Run one epoch of mini-Batch Gradient Descent over (X, y).
+
+        Returns:
+            epoch_gradient: An array of shape [1, n_features]. The mean of the
+                gradients applied during the epoch.
+        """
+        n_samples = X.shape[0]
+        epoch_gradient = 0
+        for global_idx in range(0, n_samples, batch_size):
+            if global_idx + batch_size > n_samples:
+                samples_size = n_samples - global_idx
+            else:
+                samples_size = batch_size
+
+            batch_gradient = self._batch_gradient(X[global_idx:global_idx + samples_size],
+                                                  y[global_idx:global_idx + samples_size])
+            self._apply_gradient(batch_gradient)
+            epoch_gradient = epoch_gradient + batch_gradient * samples_size
+        return epoch_gradient / n_samples
+
+    def _init_weights(self, n_features, warm_start):
+        """Set self.W to zeros, or keep the current weights if warm_start.
+
+        Args:
+            n_features: An integer.
+            warm_start: A boolean.
+        """
+        if warm_start and self.W is not None:
+            self.W = np.reshape(np.array(self.W, dtype=self.dtype), [1, n_features])
+        else:
+            self.W = np.zeros([1, n_features], dtype=self.dtype)
+            if self.optimizer is not None:
+                self.optimizer.reset()
+
+    def _scheduled_learning_rate(self):
+        """Return learning_rate scaled by the schedule for the current epoch."""
+        if self.schedule is None:
+            return self.learning_rate
+        return self.learning_rate * self.schedule(self.n_epochs)
+
+    def _apply_gradient(self, gradient):
+        """Take one step of self.optimizer (plain gradient step if None).
+
+        Args:
+            gradient: An array of shape [1, n_features].
+        """
+        learning_rate = self._scheduled_learning_rate()
+        if self.optimizer is None:
+            self.W = self.W + learning_rate * (-gradient)
+        else:
+            self.optimizer.step(self.W, gradient, learning_rate)
+
+    def _loss(self, X, y):
+        """Compute the mean cross-entropy of self.W on (X, y).
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            y: An array of shape [n_samples,]. Only contains 1 or -1.
+
+        Returns:
+            loss: A float. Mean of log(1 + exp(-y * W.x)).
+        """
+        X = _as_matrix(X, self.dtype)
+        y = np.asarray(y, dtype=self.dtype)
+        return np.mean(np.logaddexp(0, -y * (X @ self.W[0])))
+
+    def _hessian(self, X):
+        """Compute the Hessian of the mean cross-entropy with respect to self.W.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+
+        Returns:
+            H: An array of shape [n_features, n_features].
+        """
+        X = _as_matrix(X, self.dtype)
+        p = _sigmoid(X @ self.W[0])
+        if _issparse(X):
+            H = (X.T @ sparse.diags(p * (1 - p)) @ X).toarray() / X.shape[0]
+        else:
+            H = (X.T * (p * (1 - p))) @ X / X.shape[0]
+        # small ridge keeps H invertible when the data is (nearly) separable
+        return H + 1e-10 * np.eye(X.shape[1], dtype=self.dtype)
+
+    def _reset_convergence(self):
+        """Clear the convergence bookkeeping before a new fit_* run."""
+        self.n_epochs = 0
+        self.gradient_norms = list()
+        self.training_trace = list()
+        self._epochs_below_tol = 0
+        self._epoch_start = time.perf_counter()
+
+    def _converged(self, epoch_gradient, X=None, y=None, n_samples=None):
+        """Record one finished epoch and check the stopping criterion.
+
+        If tracing is on (self.trace or self.callback), also builds a record
+        with the fields epoch, time (wall seconds of the epoch),
+        samples_per_sec, loss (mean cross-entropy on (X, y) after the epoch,
+        None without X), gradient_norm and weight_norm. It is appended to
+        self.training_trace if self.trace and passed to self.callback.
+
+        Args:
+            epoch_gradient: An array of shape [1, n_features]. The mean of the
+                gradients applied during the epoch.
+            X: An array of shape [n_samples, n_features] or None. The epoch's data.
+            y: An array of shape [n_samples,] or None.
+            n_samples: An integer or None. Samples seen in the epoch; defaults
+                to the number of rows of X.
+
+        Returns:
+            converged: A boolean. True once the gradient norm has stayed below
+                self.tol for self.patience consecutive epochs.
+        """
+        gradient_norm = np.linalg.norm(epoch_gradient)
+        self.n_epochs += 1
+        self.gradient_norms.append(gradient_norm)
+        if self.trace or self.callback is not None:
+            elapsed = time.perf_counter() - self._epoch_start
+            if n_samples is None:
+                n_samples = X.shape[0] if X is not None else 0
+            record = {'epoch': self.n_epochs,
+                      'time': elapsed,
+                      'samples_per_sec': n_samples / elapsed if elapsed > 0 else float('inf'),
+                      'loss': float(self._loss(X, y)) if X is not None else None,
+                      'gradient_norm': float(gradient_norm),
+                      'weight_norm': float(np.linalg.norm(self.W))}
+            if self.trace:
+                self.training_trace.append(record)
+            if self.callback is not None:
+                self.callback(record)
+            self._epoch_start = time.perf_counter()
+        if self.tol is None:
+            return False
+        if gradient_norm < self.tol:
+            self._epochs_below_tol += 1
+        else:
+            self._epochs_below_tol = 0
+        return self._epochs_below_tol >= self.patience
+
     def _gradient(self, _x, _y):
         """Compute the gradient of cross-entropy with respect to self.W
-        for one training sample (_x, _y). This function is used in fit_*.
+        for one training sample (_x, _y). Per-sample reference version of
+        _batch_gradient; not used in training.
 
         Args:
             _x: An array of shape [n_features,].
@@ -108,10 +507,33 @@ class logistic_regression(object):
         # np.dot == element-wise multiplication and summation
         _x = np.array(_x)
         _y = np.array(_y)
-        _g = -np.divide((_y * _x), (1 + np.exp(_y * np.dot(self.W, _x))))
+        # 1 / (1 + exp(t)) == sigmoid(-t), evaluated without overflow
+        _g = -(_y * _x) * _sigmoid(-_y * np.dot(self.W, _x))
         return _g
         ### END YOUR CODE
 
+    def _batch_gradient(self, X, y):
+        """Compute the mean gradient of cross-entropy with respect to self.W
+        over a batch of samples (X, y) with one matrix product. Equivalent to
+        averaging _gradient over the rows of X.
+
+        Args:
+            X: An array of shape [batch_size, n_features].
+            y: An array of shape [batch_size,]. Only contains 1 or -1.
+
+        Returns:
+            _g: An array of shape [1, n_features]. The mean gradient of
+                cross-entropy with respect to self.W.
+        """
+        X = _as_matrix(X, self.dtype)
+        y = np.asarray(y, dtype=self.dtype)
+        # per-sample coefficient -y_n / (1 + exp(y_n * W.x_n)) = -y_n * sigmoid(-y_n * W.x_n),
+        # shape [batch_size,]
+        coef = -y * _sigmoid(-y * (X @ self.W[0]))
+        # X.T @ coef rather than coef @ X so CSR input stays a sparse product
+        _g = (X.T @ coef) / X.shape[0]
+        return _g.reshape(1, -1)
+
     def get_params(self):
         """Get parameters for this perceptron model.
 
@@ -123,70 +545,251 @@ class logistic_regression(object):
             sys.exit(-1)
         return self.W
 
-    def predict_proba(self, X):
+    def predict_proba(self, X, chunk_size=65536):
         """Predict class probabilities for samples in X.
 
+        X is processed in chunks of chunk_size rows, so the temporaries never
+        exceed [chunk_size, 2]. Probabilities come from a stable log-sigmoid,
+        log(sigmoid(z)) = -log(1 + exp(-z)), which does not overflow for
+        large |W.x|.
+
         Args:
             X: An array of shape [n_samples, n_features].
+            chunk_size: An integer.
 
         Returns:
             preds_proba: An array of shape [n_samples, 2].
                 Only contains floats between [0,1].
         """
         ### YOUR CODE HERE
-        prediction = list()
-        prediction_the_other = list()
-
-        for x_single_sample in X:
-            prob = 1 / (1 + np.exp(-np.dot(self.W, x_single_sample)))   # scalar value
-            prediction.append(prob)                 # row vector
-            prediction_the_other.append(1-prob)     # row vector
-
-        # Vertically stack two row vectors and transpose it.
-        # Then it becomes column vector with two columns.
-        # This satisfies the above condition. Shape of preds_proba == [n_samples, 2]
-        preds_proba = np.vstack([prediction, prediction_the_other]).transpose()
+        preds_proba = np.empty([X.shape[0], 2], dtype=self.dtype)
+        for start, z in self._decision_chunks(X, chunk_size):
+            # column 0: P(y=1|x), column 1: P(y=-1|x)
+            preds_proba[start:start + z.shape[0], 0] = _sigmoid(z)
+            preds_proba[start:start + z.shape[0], 1] = _sigmoid(-z)
 
         return preds_proba
         ### END YOUR CODE
 
-    def predict(self, X):
+    def predict(self, X, chunk_size=65536):
         """Predict class labels for samples in X.
 
         Args:
             X: An array of shape [n_samples, n_features].
+            chunk_size: An integer.
 
         Returns:
             preds: An array of shape [n_samples,]. Only contains 1 or -1.
         """
         ### YOUR CODE HERE
-        preds = list()
-        for x_single_sample in X:
-            if np.dot(self.W, x_single_sample) >= 0:
-                preds.append(1)
-            else:
-                preds.append(-1)
+        preds = np.empty(X.shape[0], dtype=int)
+        for start, z in self._decision_chunks(X, chunk_size):
+            preds[start:start + z.shape[0]] = np.where(z >= 0, 1, -1)
 
-        # print("shape of predictions", np.array(prediction).shape)
         return preds
         ### END YOUR CODE
 
-    def score(self, X, y):
+    def score(self, X, y, chunk_size=65536):
         """Returns the mean accuracy on the given test data and labels.
 
         Args:
             X: An array of shape [n_samples, n_features].
             y: An array of shape [n_samples,]. Only contains 1 or -1.
+            chunk_size: An integer.
 
         Returns:
             score: An float. Mean accuracy of self.predict(X) wrt. y.
         """
         ### YOUR CODE HERE
-        prediction = self.predict(X)
-        score = np.divide(np.sum(y == prediction), X.shape[0]) * 100
+        y = np.asarray(y)
+        n_correct = 0
+        for start, z in self._decision_chunks(X, chunk_size):
+            n_correct += np.sum(y[start:start + z.shape[0]] == np.where(z >= 0, 1, -1))
+        score = np.divide(n_correct, X.shape[0]) * 100
         return score
         ### END YOUR CODE
 
+    def _decision_chunks(self, X, chunk_size):
+        """Compute W.x for the rows of X, chunk_size rows at a time.
+
+        Args:
+            X: An array of shape [n_samples, n_features].
+            chunk_size: An integer.
+
+        Yields:
+            (start, z): The index of the chunk's first row and an array of
+                shape [chunk_size,] holding W.x for each row of the chunk.
+        """
+        w = np.reshape(self.W, -1)
+        for start in range(0, X.shape[0], chunk_size):
+            yield start, _as_matrix(X[start:start + chunk_size], self.dtype) @ w
+
     def assign_weights(self, weights):
         self.W = weights
         return self
+
+
+def fit_many(X, y, configs, dtype=np.float64):
+    """Train several logistic_regression models on (X, y) in one pass per epoch.
+
+    Configurations that share a batch size see exactly the same mini-batches,
+    so their weight vectors are stacked into one [n_models, n_features]
+    matrix and updated in lockstep with a single matrix product per batch.
+    The data is walked in blocks whose size is a multiple of every batch size,
+    and each group consumes its mini-batches from the block while it is hot.
+    Each model ends up with the same weights as its own fit_miniBGD run.
+
+    Args:
+        X: An array of shape [n_samples, n_features].
+        y: An array of shape [n_samples,]. Only contains 1 or -1.
+        configs: A list of dicts with keys 'learning_rate', 'max_iter' and
+            'batch_size'. A batch_size of None means the full batch (fit_BGD);
+            1 is fit_SGD.
+        dtype: A numpy float dtype for the weights and gradients.
+
+    Returns:
+        models: A list of fitted logistic_regression, in the order of configs.
+    """
+    X = _as_matrix(X)
+    y = np.asarray(y, dtype=dtype)
+    n_samples, n_features = X.shape
+
+    groups = dict()
+    for idx, config in enumerate(configs):
+        batch_size = min(config['batch_size'] or n_samples, n_samples)
+        groups.setdefault(batch_size, list()).append(idx)
+
+    block_size = 1
+    for batch_size in groups:
+        block_size = block_size * batch_size // math.gcd(block_size, batch_size)
+    block_size = min(block_size, n_samples)
+
+    W = {b: np.zeros([len(idxs), n_features], dtype=dtype) for b, idxs in groups.items()}
+    learning_rate = {b: np.array([configs[i]['learning_rate'] for i in idxs], dtype=dtype)
+                     for b, idxs in groups.items()}
+    max_iter = {b: np.array([configs[i]['max_iter'] for i in idxs]) for b, idxs in groups.items()}
+    gradient_norms = {b: [list() for _ in idxs] for b, idxs in groups.items()}
+
+    for epoch in range(max(config['max_iter'] for config in configs)):
+        active = {b: np.nonzero(max_iter[b] > epoch)[0] for b in groups}
+        epoch_gradient = {b: np.zeros([len(active[b]), n_features], dtype=dtype) for b in groups}
+        for block_idx in range(0, n_samples, block_size):
+            X_block = _as_matrix(X[block_idx:block_idx + block_size], dtype)
+            y_block = y[block_idx:block_idx + block_size]
+            for batch_size in groups:
+                rows = active[batch_size]
+                if len(rows) == 0:
+                    continue
+                W_active = W[batch_size][rows]
+                for global_idx in range(0, X_block.shape[0], batch_size):
+                    X_batch = X_block[global_idx:global_idx + batch_size]
+                    y_batch = y_block[global_idx:global_idx + batch_size]
+                    # coefficient -y_n / (1 + exp(y_n * W_m.x_n)), shape [batch_size, n_active]
+                    coef = -y_batch[:, None] * _sigmoid(-y_batch[:, None] * (X_batch @ W_active.T))
+                    batch_gradient = (X_batch.T @ coef).T / X_batch.shape[0]
+                    W_active = W_active - learning_rate[batch_size][rows, None] * batch_gradient
+                    epoch_gradient[batch_size] += batch_gradient * X_batch.shape[0]
+                W[batch_size][rows] = W_active
+        for batch_size in groups:
+            norms = np.linalg.norm(epoch_gradient[batch_size] / n_samples, axis=1)
+            for row, norm in zip(active[batch_size], norms):
+                gradient_norms[batch_size][row].append(norm)
+
+    models = [None] * len(configs)
+    for batch_size, idxs in groups.items():
+        for row, idx in enumerate(idxs):
+            model = logistic_regression(configs[idx]['learning_rate'], configs[idx]['max_iter'], dtype=dtype)
+            model.assign_weights(W[batch_size][row:row + 1].copy())
+            model.n_epochs = configs[idx]['max_iter']
+            model.gradient_norms = gradient_norms[batch_size][row]
+            models[idx] = model
+    return models
+
+
+# X, y, W and a model over W attached in a fit_hogwild worker process
+_hogwild = dict()
+
+
+def _hogwild_attach(descriptors, dtype, X_sparse):
+    """fit_hogwild worker initializer: map the shared X, y and W. W stays
+    writable; every worker updates it in place without a lock. A sparse X is
+    not in shared memory and is passed in X_sparse instead."""
+    _hogwild.update(attach(descriptors, writeable=True))
+    if X_sparse is not None:
+        _hogwild['X'] = X_sparse
+    _hogwild['model'] = logistic_regression(learning_rate=0, max_iter=0, dtype=dtype).assign_weights(_hogwild['W'])
+
+
+def _hogwild_shard(task):
+    """Run fit_SGD's per-sample updates over rows start:end of the shared X
+    with a fixed learning rate.
+
+    Returns:
+        shard_gradient: An array of shape [1, n_features]. The sum of the
+            gradients applied.
+    """
+    start, end, learning_rate = task
+    model, X, y = _hogwild['model'], _hogwild['X'], _hogwild['y']
+    shard_gradient = 0
+    for j in range(start, end):
+        one_sample_gradient = model._batch_gradient(X[j:j + 1], y[j:j + 1])
+        # in-place update of the shared buffer, no lock
+        np.subtract(model.W, learning_rate * one_sample_gradient, out=model.W)
+        shard_gradient = shard_gradient + one_sample_gradient
+    return shard_gradient
+
+
+def _rebatch(chunks, batch_size):
+    """Re-cut a stream of (X, y) chunks of arbitrary sizes into mini-batches
+    of batch_size rows. Only the leftover rows of the previous chunk (fewer
+    than batch_size) are ever copied; the last mini-batch may be smaller.
+
+    Args:
+        chunks: An iterable of (X, y) pairs with X of shape [n_i, n_features]
+            and y of shape [n_i,].
+        batch_size: An integer.
+
+    Yields:
+        (X_batch, y_batch): Arrays of shape [batch_size, n_features] and
+            [batch_size,].
+    """
+    rest_X, rest_y = None, None
+    for X, y in chunks:
+        start = 0
+        if rest_X is not None:
+            start = batch_size - rest_X.shape[0]
+            rest_X = sparse.vstack([rest_X, X[:start]], format='csr') if _issparse(X) else np.concatenate([rest_X, X[:start]])
+            rest_y = np.concatenate([rest_y, y[:start]])
+            if rest_X.shape[0] < batch_size:
+                continue
+            yield rest_X, rest_y
+            rest_X, rest_y = None, None
+        n_samples = X.shape[0]
+        for global_idx in range(start, n_samples, batch_size):
+            if global_idx + batch_size > n_samples:
+                rest_X = X[global_idx:].copy() if _issparse(X) else np.array(X[global_idx:])
+                rest_y = np.array(y[global_idx:])
+            else:
+                yield X[global_idx:global_idx + batch_size], y[global_idx:global_idx + batch_size]
+    if rest_X is not None and rest_X.shape[0] > 0:
+        yield rest_X, rest_y
+
+
+def _issparse(X):
+    """Return True if X is a scipy.sparse matrix (False without scipy)."""
+    return sparse is not None and sparse.issparse(X)
+
+
+def _as_matrix(X, dtype=None):
+    """Return X as a CSR matrix if it is sparse, otherwise as an ndarray.
+    Casts to dtype if given; no copy is made when X already has it."""
+    if _issparse(X):
+        X = X.tocsr()
+        return X if dtype is None else X.astype(dtype, copy=False)
+    return np.asarray(X, dtype=dtype)
+
+
+def _sigmoid(z):
+    """Numerically stable sigmoid, exp(log_sigmoid(z)) with
+    log_sigmoid(z) = -log(1 + exp(-z)). Keeps the dtype of z."""
+    return np.exp(-np.logaddexp(0, -z))
@@ -0,0 +1,113 @@
+import numpy as np
+import math
+
+"""This script implements the update rules and learning-rate schedules used
+by the fit_* methods of logistic_regression and logistic_regression_multiclass.
+
+An optimizer updates the weights in place from a gradient; a schedule maps the
+number of finished epochs to a multiplier of the base learning rate.
+"""
+
+
+class Optimizer(object):
+    """Plain gradient step W <- W - lr * g. Base class of the optimizers."""
+
+    def reset(self):
+        """Forget all state, e.g. before a new fit."""
+        self.state = None
+
+    def step(self, W, gradient, learning_rate, rows=slice(None)):
+        """Update W[rows] in place.
+
+        Args:
+            W: An array of shape [n_rows, n_features]. The weights.
+            gradient: An array with the shape of W[rows].
+            learning_rate: A float. The scheduled learning rate.
+            rows: A slice or an integer array. The rows of W the gradient is for.
+        """
+        W[rows] -= learning_rate * gradient
+
+    def _buffers(self, W, n):
+        """Return n zero-initialized state buffers shaped like W, allocating
+        them on the first step or when W changed shape."""
+        if getattr(self, 'state', None) is None or self.state[0].shape != W.shape:
+            self.state = [np.zeros_like(W) for _ in range(n)]
+            self.t = 0
+        return self.state
+
+
+class Momentum(Optimizer):
+    """Heavy-ball momentum, optionally in the Nesterov form.
+
+    v <- momentum * v + g
+    W <- W - lr * v                      (classic)
+    W <- W - lr * (g + momentum * v)     (nesterov)
+    """
+
+    def __init__(self, momentum=0.9, nesterov=False):
+        self.momentum = momentum
+        self.nesterov = nesterov
+        self.reset()
+
+    def step(self, W, gradient, learning_rate, rows=slice(None)):
+        velocity, = self._buffers(W, 1)
+        v = self.momentum * velocity[rows] + gradient
+        velocity[rows] = v
+        if self.nesterov:
+            W[rows] -= learning_rate * (gradient + self.momentum * v)
+        else:
+            W[rows] -= learning_rate * v
+
+
+class Adam(Optimizer):
+    """Adam with bias correction. With a subset of rows only their moments
+    are updated (lazy Adam), which keeps sampled/hierarchical steps cheap."""
+
+    def __init__(self, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.reset()
+
+    def step(self, W, gradient, learning_rate, rows=slice(None)):
+        m, v = self._buffers(W, 2)
+        self.t += 1
+        m[rows] = self.beta1 * m[rows] + (1 - self.beta1) * gradient
+        v[rows] = self.beta2 * v[rows] + (1 - self.beta2) * gradient * gradient
+        m_hat = m[rows] / (1 - self.beta1 ** self.t)
+        v_hat = v[rows] / (1 - self.beta2 ** self.t)
+        W[rows] -= learning_rate * m_hat / (np.sqrt(v_hat) + self.eps)
+
+
+class StepDecay(object):
+    """Multiply the learning rate by gamma every step_size epochs."""
+
+    def __init__(self, step_size, gamma=0.1):
+        self.step_size = step_size
+        self.gamma = gamma
+
+    def __call__(self, epoch):
+        return self.gamma ** (epoch // self.step_size)
+
+
+class ExponentialDecay(object):
+    """Multiply the learning rate by gamma every epoch."""
+
+    def __init__(self, gamma=0.99):
+        self.gamma = gamma
+
+    def __call__(self, epoch):
+        return self.gamma ** epoch
+
+
+class CosineDecay(object):
+    """Anneal the learning rate from 1x to min_factor x over total_epochs
+    along a half cosine, then stay at min_factor."""
+
+    def __init__(self, total_epochs, min_factor=0.0):
+        self.total_epochs = total_epochs
+        self.min_factor = min_factor
+
+    def __call__(self, epoch):
+        progress = min(epoch, self.total_epochs) / self.total_epochs
+        return self.min_factor + (1 - self.min_factor) * 0.5 * (1 + math.cos(math.pi * progress))
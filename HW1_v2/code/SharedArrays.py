@@ -0,0 +1,64 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+"""This script places numpy arrays in shared memory for worker processes,
+used by ExperimentRunner and logistic_regression.fit_hogwild.
+
+The parent copies each array into a block once (SharedArrays); workers map
+the blocks by name (attach) instead of receiving a pickled copy.
+"""
+
+# blocks attached in this process; kept open for the lifetime of the worker
+_attached_blocks = list()
+
+
+class SharedArrays(object):
+    """Copy a dict of arrays into shared memory blocks, one block per array.
+
+    Use as a context manager; the blocks are released on exit.
+    """
+
+    def __init__(self, arrays):
+        self.blocks = list()
+        self.descriptors = dict()
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.descriptors[key] = (block.name, array.shape, array.dtype.str)
+
+    def array(self, key):
+        """Return a writable array over the shared block of key. Drop it
+        before the context exits."""
+        _, shape, dtype = self.descriptors[key]
+        block = self.blocks[list(self.descriptors).index(key)]
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def attach(descriptors, writeable=False):
+    """Map the blocks described by SharedArrays.descriptors in a worker.
+
+    Args:
+        descriptors: A dict mapping a key to (block name, shape, dtype string).
+        writeable: A boolean. If False the arrays are read-only.
+
+    Returns:
+        arrays: A dict mapping each key to an array over its shared block.
+    """
+    arrays = dict()
+    for key, (name, shape, dtype) in descriptors.items():
+        block = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = writeable
+        _attached_blocks.append(block)
+        arrays[key] = array
+    return arrays
@@ -1,21 +1,88 @@
 from calendar import c
 import os
+import sys
+import time
 import matplotlib.pyplot as plt
-from LogisticRegression import logistic_regression
+from matplotlib.colors import to_rgb
+from LogisticRegression import logistic_regression, fit_many
 from LRM import logistic_regression_multiclass
 from DataReader import *
+from Optimizers import Adam, Momentum, CosineDecay
+from ExperimentRunner import Experiment, run_experiments, print_results, cross_validate, print_cv_results
 
 data_dir = "../data"
 train_filename = "training.npz"
 test_filename = "test.npz"
 
+# Above this many samples the visualize_* functions draw density bins instead
+# of one marker per sample, unless density is given explicitly.
+DENSITY_THRESHOLD = 10000
 
-def visualize_features(X, y):
+
+def _use_density(X, density):
+    return X.shape[0] > DENSITY_THRESHOLD if density is None else density
+
+
+def plot_density(X, y, classes, colors, names, extent, bins=200):
+    '''Draw the samples as a 2-D histogram: each bin takes the color of
+    its most frequent class and an opacity growing with log(count). The
+    drawn image has bins x bins pixels whatever the number of samples.
+
+    Args:
+        X: An array of shape [n_samples, 2].
+        y: An array of shape [n_samples,].
+        classes: A list of the labels to draw.
+        colors: A list of matplotlib colors, one per class.
+        names: A list of legend labels, one per class.
+        extent: ((x_min, x_max), (y_min, y_max)). Samples outside are dropped.
+        bins: An integer. Number of bins along each axis.
+    '''
+    image = np.zeros((bins, bins, 4))
+    top_counts = np.zeros((bins, bins))
+    for label, color, name in zip(classes, colors, names):
+        mask = y == label
+        counts, _, _ = np.histogram2d(X[mask, 0], X[mask, 1], bins=bins, range=extent)
+        counts = counts.T  # image rows run along the second feature
+        image[counts > top_counts, :3] = to_rgb(color)
+        top_counts = np.maximum(top_counts, counts)
+        plt.scatter([], [], c=color, marker='s', label=name)
+    if top_counts.max() > 0:
+        image[..., 3] = np.where(top_counts > 0, 0.3 + 0.7 * np.log1p(top_counts) / np.log1p(top_counts.max()), 0)
+    (x_min, x_max), (y_min, y_max) = extent
+    plt.imshow(image, extent=(x_min, x_max, y_min, y_max), origin='lower', aspect='auto', interpolation='nearest')
+
+
+def plot_decision_regions(W, colors, extent, resolution=300):
+    '''Shade the region predicted for each class by a softmax model on a
+    resolution x resolution grid, and draw the boundaries between regions.
+
+    The grid points get the features [1, x, y] of prepare_X and are labelled
+    by one batched predict call.
+
+    Args:
+        W: An array of shape [k, 3]. Weights of logistic_regression_multiclass.
+        colors: A list of k matplotlib colors.
+        extent: ((x_min, x_max), (y_min, y_max)).
+        resolution: An integer. Grid points along each axis.
+    '''
+    (x_min, x_max), (y_min, y_max) = extent
+    grid_x, grid_y = np.meshgrid(np.linspace(x_min, x_max, resolution), np.linspace(y_min, y_max, resolution))
+    grid = np.column_stack([np.ones(grid_x.size), grid_x.ravel(), grid_y.ravel()])
+    k = W.shape[0]
+    model = logistic_regression_multiclass(learning_rate=0, max_iter=0, k=k).assign_weights(W)
+    regions = model.predict(grid).reshape(grid_x.shape)
+    plt.contourf(grid_x, grid_y, regions, levels=np.arange(k + 1) - 0.5, colors=colors, alpha=0.15)
+    plt.contour(grid_x, grid_y, regions, levels=np.arange(1, k) - 0.5, colors='black', alpha=0.5)
+
+
+def visualize_features(X, y, density=None):
     '''This function is used to plot a 2-D scatter plot of training features.
 
     Args:
         X: An array of shape [n_samples, 2].
         y: An array of shape [n_samples,]. Only contains 1 or -1.
+        density: A boolean, or None to draw density bins only when there are
+            more than DENSITY_THRESHOLD samples.
 
     Returns:
         No return. Save the plot to 'train_features.*' and include it
@@ -23,8 +90,11 @@ def visualize_features(X, y):
     '''
     ### YOUR CODE HERE
     plt.figure(figsize=(10, 6))
-    plt.scatter(X[y == 1, 0], X[y == 1, 1], c='green', marker='o', label='class 1', alpha=0.5)
-    plt.scatter(X[y == -1, 0], X[y == -1, 1], c='red', marker='s', label='class 2 (or -1)', alpha=0.5)
+    if _use_density(X, density):
+        plot_density(X, y, [1, -1], ['green', 'red'], ['class 1', 'class 2 (or -1)'], ((-1, 0.3), (-1, 0.3)))
+    else:
+        plt.scatter(X[y == 1, 0], X[y == 1, 1], c='green', marker='o', label='class 1', alpha=0.5)
+        plt.scatter(X[y == -1, 0], X[y == -1, 1], c='red', marker='s', label='class 2 (or -1)', alpha=0.5)
     plt.title('Data')
     plt.xlim([-1, 0.3])
     plt.ylim([-1, 0.3])
@@ -36,13 +106,15 @@ def visualize_features(X, y):
     ### END YOUR CODE
 
 
-def visualize_result(X, y, W):
+def visualize_result(X, y, W, density=None):
     '''This function is used to plot the sigmoid model after training.
 
     Args:
         X: An array of shape [n_samples, 2].
         y: An array of shape [n_samples,]. Only contains 1 or -1.
         W: An array of shape [n_features,].
+        density: A boolean, or None to draw density bins only when there are
+            more than DENSITY_THRESHOLD samples.
 
     Returns:
         No return. Save the plot to 'train_result_sigmoid.*' and include it
@@ -53,8 +125,11 @@ def visualize_result(X, y, W):
     ys = -W[0, 0] / W[0, 2] - W[0, 1] / W[0, 2] * xs
 
     plt.figure(figsize=(10, 6))
-    plt.scatter(X[y == 1, 0], X[y == 1, 1], c='green', marker='o', label='class 1', alpha=0.5)
-    plt.scatter(X[y == -1, 0], X[y == -1, 1], c='red', marker='s', label='class 2 (or -1)', alpha=0.5)
+    if _use_density(X, density):
+        plot_density(X, y, [1, -1], ['green', 'red'], ['class 1', 'class 2 (or -1)'], ((-1.1, 0.3), (-1.1, 0.3)))
+    else:
+        plt.scatter(X[y == 1, 0], X[y == 1, 1], c='green', marker='o', label='class 1', alpha=0.5)
+        plt.scatter(X[y == -1, 0], X[y == -1, 1], c='red', marker='s', label='class 2 (or -1)', alpha=0.5)
     plt.plot(xs, ys, c='orange', label='Decision Boundary', linestyle='-.')
     plt.title('Binary Classification with Logistic Regression')
     plt.xlim([-1.1, 0.3])
@@ -67,42 +142,53 @@ def visualize_result(X, y, W):
     ### END YOUR CODE
 
 
-def visualize_result_multi(X, y, W):
+def visualize_result_multi(X, y, W, density=None):
     '''This function is used to plot the softmax model after training.
 
+    With density bins the decision boundaries are drawn as the predicted
+    class regions on a grid instead of the pairwise boundary lines.
+
     Args:
         X: An array of shape [n_samples, 2].
         y: An array of shape [n_samples,]. Only contains 0,1,2.
         W: An array of shape [n_features, 3].
+        density: A boolean, or None to draw density bins only when there are
+            more than DENSITY_THRESHOLD samples.
 
     Returns:
         No return. Save the plot to 'train_result_softmax.*' and include it
         in submission.
     '''
     ### YOUR CODE HERE
-    xs = np.linspace(np.min(X[:, 0]), np.max(X[:, 0]), 100)
-    ys0 = -(W[0, 0] - W[1, 0]) / (W[0, 2] - W[1, 2]) - (W[0, 1] - W[1, 1]) / (W[0, 2] - W[1, 2]) * xs
-    ys1 = -(W[0, 0] - W[2, 0]) / (W[0, 2] - W[2, 2]) - (W[0, 1] - W[2, 1]) / (W[0, 2] - W[2, 2]) * xs
-    ys2 = -(W[1, 0] - W[2, 0]) / (W[1, 2] - W[2, 2]) - (W[1, 1] - W[2, 1]) / (W[1, 2] - W[2, 2]) * xs
-
-    ys0_ys1 = np.maximum.reduce([ys0, ys1])
-    ys0_ys2 = np.minimum.reduce([ys0, ys2])
-
     plt.figure(figsize=(10, 6))
-    plt.scatter(X[y == 0, 0], X[y == 0, 1], c='green', marker='o', label='class 1', alpha=0.5)
-    plt.scatter(X[y == 1, 0], X[y == 1, 1], c='red', marker='s', label='class 2', alpha=0.5)
-    plt.scatter(X[y == 2, 0], X[y == 2, 1], c='blue', marker='^', label='class 3', alpha=0.5)
-
-    # # original decision boundary
-    # plt.plot(xs, ys0, c='yellow', label='DB between class 1 and 2', alpha=0.5)
-    # plt.plot(xs, ys1, c='black',  label='DB between class 1 and 3', alpha=0.5)
-    # plt.plot(xs, ys2, c='purple', label='DB between class 2 and 3', alpha=0.5)
-
-    # new decision boundary
-    # combination of 'decision boundary between class 1 and 2' + 'decision boundary between class 1 and 3'
-    plt.plot(xs, ys0_ys1, c='black', alpha=0.5)
-    # combination of 'decision boundary between class 1 and 2' + 'decision boundary between class 2 and 3'
-    plt.plot(xs, ys0_ys2, c='black', alpha=0.5)
+    if _use_density(X, density):
+        extent = ((-1.1, 0.3), (-1.1, 0.3))
+        colors = ['green', 'red', 'blue']
+        plot_decision_regions(W, colors, extent)
+        plot_density(X, y, [0, 1, 2], colors, ['class 1', 'class 2', 'class 3'], extent)
+    else:
+        xs = np.linspace(np.min(X[:, 0]), np.max(X[:, 0]), 100)
+        ys0 = -(W[0, 0] - W[1, 0]) / (W[0, 2] - W[1, 2]) - (W[0, 1] - W[1, 1]) / (W[0, 2] - W[1, 2]) * xs
+        ys1 = -(W[0, 0] - W[2, 0]) / (W[0, 2] - W[2, 2]) - (W[0, 1] - W[2, 1]) / (W[0, 2] - W[2, 2]) * xs
+        ys2 = -(W[1, 0] - W[2, 0]) / (W[1, 2] - W[2, 2]) - (W[1, 1] - W[2, 1]) / (W[1, 2] - W[2, 2]) * xs
+
+        ys0_ys1 = np.maximum.reduce([ys0, ys1])
+        ys0_ys2 = np.minimum.reduce([ys0, ys2])
+
+        plt.scatter(X[y == 0, 0], X[y == 0, 1], c='green', marker='o', label='class 1', alpha=0.5)
+        plt.scatter(X[y == 1, 0], X[y == 1, 1], c='red', marker='s', label='class 2', alpha=0.5)
+        plt.scatter(X[y == 2, 0], X[y == 2, 1], c='blue', marker='^', label='class 3', alpha=0.5)
+
+        # # original decision boundary
+        # plt.plot(xs, ys0, c='yellow', label='DB between class 1 and 2', alpha=0.5)
+        # plt.plot(xs, ys1, c='black',  label='DB between class 1 and 3', alpha=0.5)
+        # plt.plot(xs, ys2, c='purple', label='DB between class 2 and 3', alpha=0.5)
+
+        # new decision boundary
+        # combination of 'decision boundary between class 1 and 2' + 'decision boundary between class 1 and 3'
+        plt.plot(xs, ys0_ys1, c='black', alpha=0.5)
+        # combination of 'decision boundary between class 1 and 2' + 'decision boundary between class 2 and 3'
+        plt.plot(xs, ys0_ys2, c='black', alpha=0.5)
 
     plt.title('Multiclass Classification')
     plt.xlim([-1.1, 0.3])
@@ -120,26 +206,20 @@ def main():
     # Read data for training.
 
     raw_data, labels = load_data(os.path.join(data_dir, train_filename))
-    raw_train, raw_valid, label_train, label_valid = train_valid_split(raw_data, labels, 2300)
 
-    ##### Preprocess raw data to extract features
-    train_X_all = prepare_X(raw_train)
-    valid_X_all = prepare_X(raw_valid)
-    ##### Preprocess labels for all data to 0,1,2 and return the idx for data from '1' and '2' class.
-    train_y_all, train_idx = prepare_y(label_train)
-    valid_y_all, val_idx = prepare_y(label_valid)
+    ##### Preprocess raw data to extract features. The subsets below are lazy
+    ##### views of it (see common/Dataset.py): rows are gathered and labels
+    ##### remapped only when .X / .y is read.
+    data = Dataset(prepare_X_cached(raw_data), labels)
+    train_all, valid_all = data[:2300], data[2300:]
 
     ####### For binary case, only use data from '1' and '2'
-    train_X = train_X_all[train_idx]
-    train_y = train_y_all[train_idx]
     ####### Only use the first 1350 data examples for binary training.
-    train_X = train_X[0:1350]
-    train_y = train_y[0:1350]
-    valid_X = valid_X_all[val_idx]
-    valid_y = valid_y_all[val_idx]
+    train_bin = train_all.where(1, 2)[0:1350]
+    valid_bin = valid_all.where(1, 2)
     ####### set lables to  1 and -1. Here convert label '2' to '-1' which means we treat data '1' as postitive class.
-    train_y[np.where(train_y == 2)] = -1
-    valid_y[np.where(valid_y == 2)] = -1
+    train_X, train_y = train_bin.X, train_bin.relabel({2: -1}).y
+    valid_X, valid_y = valid_bin.X, valid_bin.relabel({2: -1}).y
     data_shape = train_y.shape[0]
 
     #    # Visualize training data.
@@ -148,27 +228,18 @@ def main():
     # ------------Logistic Regression Sigmoid Case------------
 
     ##### Check BGD, SGD, miniBGD
-    logisticR_classifier = logistic_regression(learning_rate=0.5, max_iter=100)
-
-    logisticR_classifier.fit_BGD(train_X, train_y)
-    print(logisticR_classifier.get_params())
-    print(logisticR_classifier.score(train_X, train_y))
-
-    logisticR_classifier.fit_miniBGD(train_X, train_y, data_shape)
-    print(logisticR_classifier.get_params())
-    print(logisticR_classifier.score(train_X, train_y))
-
-    logisticR_classifier.fit_SGD(train_X, train_y)
-    print(logisticR_classifier.get_params())
-    print(logisticR_classifier.score(train_X, train_y))
-
-    logisticR_classifier.fit_miniBGD(train_X, train_y, 1)
-    print(logisticR_classifier.get_params())
-    print(logisticR_classifier.score(train_X, train_y))
-
-    logisticR_classifier.fit_miniBGD(train_X, train_y, 10)
-    print(logisticR_classifier.get_params())
-    print(logisticR_classifier.score(train_X, train_y))
+    ##### All five fits share one pass over the data per epoch.
+    ##### batch_size None is BGD, data_shape is full-batch miniBGD and 1 is SGD.
+    check_classifiers = fit_many(train_X, train_y, [
+        dict(learning_rate=0.5, max_iter=100, batch_size=None),
+        dict(learning_rate=0.5, max_iter=100, batch_size=data_shape),
+        dict(learning_rate=0.5, max_iter=100, batch_size=1),
+        dict(learning_rate=0.5, max_iter=100, batch_size=1),
+        dict(learning_rate=0.5, max_iter=100, batch_size=10),
+    ])
+    for logisticR_classifier in check_classifiers:
+        print(logisticR_classifier.get_params())
+        print(logisticR_classifier.score(train_X, train_y))
 
     # Explore different hyper-parameters.
     ### YOUR CODE HERE
@@ -205,13 +276,10 @@ def main():
     print()
     print("BEGIN: Best LR test accuracy")
     test_data, test_labels = load_data(os.path.join(data_dir, test_filename))
-    test_X_all = prepare_X(test_data)
-    test_y_all, test_idx = prepare_y(test_labels)
-
-    test_X = test_X_all[test_idx]
-    test_y = test_y_all[test_idx]
+    test_all = Dataset(prepare_X_cached(test_data), test_labels)
+    test_bin = test_all.where(1, 2)
 
-    test_y[np.where(test_y == 2)] = -1
+    test_X, test_y = test_bin.X, test_bin.relabel({2: -1}).y
 
     print("Accuracy on test data:", best_logisticR.score(test_X, test_y))
     print("END: Best LR test accuracy")
@@ -220,10 +288,8 @@ def main():
 
     # ------------Logistic Regression Multiple-class case, let k= 3------------
     ###### Use all data from '0' '1' '2' for training
-    train_X = train_X_all
-    train_y = train_y_all
-    valid_X = valid_X_all
-    valid_y = valid_y_all
+    train_X, train_y = train_all.X, train_all.y
+    valid_X, valid_y = valid_all.X, valid_all.y
 
     #########  miniBGD for multiclass Logistic Regression
     logisticR_classifier_multiclass = logistic_regression_multiclass(learning_rate=0.5, max_iter=100, k=3)
@@ -252,11 +318,7 @@ def main():
     print("BEGIN: Best Multi LR test accuracy")
     visualize_result_multi(train_X[:, 1:3], train_y, best_logistic_multi_R.get_params())
 
-    test_data, test_labels = load_data(os.path.join(data_dir, test_filename))
-    test_X_all = prepare_X(test_data)
-    test_y_all, _ = prepare_y(test_labels)
-
-    print("Accuracy on test data:", best_logistic_multi_R.score(test_X_all, test_y_all))
+    print("Accuracy on test data:", best_logistic_multi_R.score(test_all.X, test_all.y))
     print("END: Best Multi LR test accuracy")
     print("***************** !Logistic Regression Multiple-class case DONE! *****************\n")
     ### END YOUR CODE
@@ -265,14 +327,8 @@ def main():
     ############ Now set k=2, only use data from '1' and '2'
 
     #####  set labels to 0,1 for softmax classifer
-    train_X = train_X_all[train_idx]
-    train_y = train_y_all[train_idx]
-    train_X = train_X[0:1350]
-    train_y = train_y[0:1350]
-    valid_X = valid_X_all[val_idx]
-    valid_y = valid_y_all[val_idx]
-    train_y[np.where(train_y == 2)] = 0
-    valid_y[np.where(valid_y == 2)] = 0
+    train_X, train_y = train_bin.X, train_bin.relabel({2: 0}).y
+    valid_X, valid_y = valid_bin.X, valid_bin.relabel({2: 0}).y
 
     ###### First, fit softmax classifer until convergence, and evaluate
     ##### Hint: we suggest to set the convergence condition as "np.linalg.norm(gradients*1./batch_size) < 0.0005" or max_iter=10000:
@@ -280,13 +336,13 @@ def main():
     print()
     print("BEGIN: fit softmax classifier until convergence, and evaluate")
 
-    test_X = test_X_all[test_idx]
-    test_y = test_y_all[test_idx]
-    test_y[np.where(test_y == 2)] = 0
+    test_X, test_y = test_bin.X, test_bin.relabel({2: 0}).y
 
-    compare_logistic_multi_R = logistic_regression_multiclass(learning_rate=1e-2, max_iter=10000, k=2)
+    compare_logistic_multi_R = logistic_regression_multiclass(learning_rate=1e-2, max_iter=10000, k=2, tol=0.0005)
     compare_logistic_multi_R.fit_miniBGD(train_X, train_y, 5)
 
+    print("epochs until convergence -->", compare_logistic_multi_R.n_epochs)
+
     print("parameters -->", compare_logistic_multi_R.get_params())
     print("train accuracy -->", compare_logistic_multi_R.score(train_X, train_y))
     print("valid accuracy -->", compare_logistic_multi_R.score(valid_X, valid_y))
@@ -294,30 +350,24 @@ def main():
     print("END: fit softmax classifier until convergence, and evaluate")
     ### END YOUR CODE
 
-    train_X = train_X_all[train_idx]
-    train_y = train_y_all[train_idx]
-    train_X = train_X[0:1350]
-    train_y = train_y[0:1350]
-    valid_X = valid_X_all[val_idx]
-    valid_y = valid_y_all[val_idx]
     #####       set lables to -1 and 1 for sigmoid classifer
-    train_y[np.where(train_y == 2)] = -1
-    valid_y[np.where(valid_y == 2)] = -1
+    train_X, train_y = train_bin.X, train_bin.relabel({2: -1}).y
+    valid_X, valid_y = valid_bin.X, valid_bin.relabel({2: -1}).y
 
     ###### Next, fit sigmoid classifier until convergence, and evaluate
     ##### Hint: we suggest to set the convergence condition as "np.linalg.norm(gradients*1./batch_size) < 0.0005" or max_iter=10000:
     ### YOUR CODE HERE
-    # TO SEE GRADIENTS, UNCOMMENT ALL LINES THAT INCLUDES all_gradients IN LRM.py and LogisticRegression.py
+    # TO SEE GRADIENTS PER EPOCH, PASS trace=True (OR A callback) AND READ training_trace
     print()
     print("START: fit sigmoid classifier until convergence, and evaluate")
 
-    test_X = test_X_all[test_idx]
-    test_y = test_y_all[test_idx]
-    test_y[np.where(test_y == 2)] = -1
+    test_X, test_y = test_bin.X, test_bin.relabel({2: -1}).y
 
-    compare_logisticR = logistic_regression(learning_rate=1e-2, max_iter=10000)
+    compare_logisticR = logistic_regression(learning_rate=1e-2, max_iter=10000, tol=0.0005)
     compare_logisticR.fit_miniBGD(train_X, train_y, 5)
 
+    print("epochs until convergence -->", compare_logisticR.n_epochs)
+
     print("parameters -->", compare_logisticR.get_params())
     print("train accuracy -->", compare_logisticR.score(train_X, train_y))
     print("valid accuracy -->", compare_logisticR.score(valid_X, valid_y))
@@ -336,25 +386,18 @@ def main():
     ### YOUR CODE HERE
     print()
     print("BEGIN: sigmoid vs softmax weights and gradients")
-    train_X = train_X_all[train_idx]
-    train_y = train_y_all[train_idx]
-    train_X = train_X[0:1350]
-    train_y = train_y[0:1350]
+    train_X = train_bin.X
 
     epoch = 1
 
     # Sigmoid
-    train_y[np.where(train_y == 2)] = -1
     binary_classifier = logistic_regression(learning_rate=2 * 1e-2, max_iter=epoch)
-    binary_classifier.fit_miniBGD(train_X, train_y, 5)
+    binary_classifier.fit_miniBGD(train_X, train_bin.relabel({2: -1}).y, 5)
     print("weights of binary classifier:", binary_classifier.get_params())
 
-    # Softmax with 2 classes
-    train_y[np.where(train_y == -1)] = 0  # we have turn train_y to '-1' when the above sigmoid classification was done
-    # as we set labels to 0,1 for softmax classifier, we should turn train_y to '0'
-
+    # Softmax with 2 classes, labels 0,1
     multi_classifier = logistic_regression_multiclass(learning_rate=1e-2, max_iter=epoch, k=2)
-    multi_classifier.fit_miniBGD(train_X, train_y, 5)
+    multi_classifier.fit_miniBGD(train_X, train_bin.relabel({2: 0}).y, 5)
     print("weights of multi (k=2) classifier:", multi_classifier.get_params())
     print("END: sigmoid vs softmax weights and gradients")
     ### END YOUR CODE
@@ -362,7 +405,148 @@ def main():
     # ------------End------------
 
 
+def run_study(n_workers=None):
+    """Run the independent experiments of main() on a process pool and print
+    one result table. Plots are not produced here; use main() for those.
+
+    Args:
+        n_workers: An integer or None (one worker per CPU).
+    """
+    raw_data, labels = load_data(os.path.join(data_dir, train_filename))
+    test_data, test_labels = load_data(os.path.join(data_dir, test_filename))
+    data = Dataset(prepare_X_cached(raw_data), labels)
+
+    arrays = dict()
+    for split, dataset in [('train', data[:2300]),
+                           ('valid', data[2300:]),
+                           ('test', Dataset(prepare_X_cached(test_data), test_labels))]:
+        binary = dataset.where(1, 2)
+        if split == 'train':
+            ####### Only use the first 1350 data examples for binary training.
+            binary = binary[0:1350]
+        arrays[split + '_X_all'] = dataset.X
+        arrays[split + '_y_all'] = dataset.y
+        arrays[split + '_X'] = binary.X
+        ####### labels 1/-1 for the sigmoid classifier, 1/0 for the softmax one
+        arrays[split + '_y_sigmoid'] = binary.relabel({2: -1}).y
+        arrays[split + '_y_softmax'] = binary.relabel({2: 0}).y
+
+    binary_eval = {split: (split + '_X', split + '_y_sigmoid') for split in ('train', 'valid', 'test')}
+    softmax_eval = {split: (split + '_X', split + '_y_softmax') for split in ('train', 'valid', 'test')}
+    multi_eval = {split: (split + '_X_all', split + '_y_all') for split in ('train', 'valid', 'test')}
+    binary_train = ('train_X', 'train_y_sigmoid')
+    data_shape = arrays['train_X'].shape[0]
+
+    experiments = [
+        Experiment('binary BGD', 'binary', dict(learning_rate=0.5, max_iter=100),
+                   'fit_BGD', (), binary_train, binary_eval),
+        Experiment('binary miniBGD full batch', 'binary', dict(learning_rate=0.5, max_iter=100),
+                   'fit_miniBGD', (data_shape,), binary_train, binary_eval),
+        Experiment('binary SGD', 'binary', dict(learning_rate=0.5, max_iter=100),
+                   'fit_SGD', (), binary_train, binary_eval),
+        Experiment('binary miniBGD batch 1', 'binary', dict(learning_rate=0.5, max_iter=100),
+                   'fit_miniBGD', (1,), binary_train, binary_eval),
+        Experiment('binary miniBGD batch 10', 'binary', dict(learning_rate=0.5, max_iter=100),
+                   'fit_miniBGD', (10,), binary_train, binary_eval),
+        Experiment('best binary miniBGD', 'binary', dict(learning_rate=1e-2, max_iter=1000),
+                   'fit_miniBGD', (5,), binary_train, binary_eval),
+        Experiment('binary miniBGD Nesterov', 'binary',
+                   dict(learning_rate=1e-2, max_iter=1000, tol=0.0005, optimizer=Momentum(0.9, nesterov=True)),
+                   'fit_miniBGD', (5,), binary_train, binary_eval),
+        Experiment('binary miniBGD Adam + cosine', 'binary',
+                   dict(learning_rate=5e-2, max_iter=1000, tol=0.0005, optimizer=Adam(), schedule=CosineDecay(1000)),
+                   'fit_miniBGD', (5,), binary_train, binary_eval),
+        Experiment('multiclass miniBGD batch 10', 'multiclass', dict(learning_rate=0.5, max_iter=100, k=3),
+                   'fit_miniBGD', (10,), ('train_X_all', 'train_y_all'), multi_eval),
+        Experiment('best multiclass miniBGD', 'multiclass', dict(learning_rate=1e-2, max_iter=1000, k=3),
+                   'fit_miniBGD', (5,), ('train_X_all', 'train_y_all'), multi_eval),
+        Experiment('softmax (k=2) until convergence', 'multiclass',
+                   dict(learning_rate=1e-2, max_iter=10000, k=2, tol=0.0005),
+                   'fit_miniBGD', (5,), ('train_X', 'train_y_softmax'), softmax_eval),
+        Experiment('sigmoid until convergence', 'binary', dict(learning_rate=1e-2, max_iter=10000, tol=0.0005),
+                   'fit_miniBGD', (5,), binary_train, binary_eval),
+        Experiment('sigmoid vs softmax: sigmoid, 1 epoch', 'binary', dict(learning_rate=2 * 1e-2, max_iter=1),
+                   'fit_miniBGD', (5,), binary_train, {}),
+        Experiment('sigmoid vs softmax: softmax, 1 epoch', 'multiclass', dict(learning_rate=1e-2, max_iter=1, k=2),
+                   'fit_miniBGD', (5,), ('train_X', 'train_y_softmax'), {}),
+    ]
+
+    print_results(run_experiments(experiments, arrays, n_workers))
+
+
+def run_cross_validation(k=5, n_workers=None):
+    """Select hyper-parameters by k-fold cross-validation on the whole
+    training file instead of the fixed 2300 split. Features are extracted
+    once and shared by all folds.
+
+    Args:
+        k: An integer. Number of folds.
+        n_workers: An integer or None (one worker per CPU).
+    """
+    raw_data, labels = load_data(os.path.join(data_dir, train_filename))
+    data = Dataset(prepare_X_cached(raw_data), labels)
+    X_all, y_all = data.X, data.y
+
+    ####### binary case: data from '1' and '2', labels 1 and -1
+    binary = data.where(1, 2).relabel({2: -1})
+    X_bin, y_bin = binary.X, binary.y
+
+    binary_configs = [dict(name='binary lr={} batch={}'.format(lr, batch_size), model='binary',
+                           params=dict(learning_rate=lr, max_iter=max_iter),
+                           fit='fit_miniBGD', fit_args=(batch_size,))
+                      for lr, max_iter in [(0.5, 100), (1e-2, 1000)] for batch_size in [1, 5, 10, X_bin.shape[0]]]
+    print("BEGIN: {}-fold cross-validation, binary".format(k))
+    print_cv_results(cross_validate(X_bin, y_bin, binary_configs, k, n_workers))
+    print("END: {}-fold cross-validation, binary".format(k))
+
+    multi_configs = [dict(name='multiclass lr={} batch={}'.format(lr, batch_size), model='multiclass',
+                          params=dict(learning_rate=lr, max_iter=max_iter, k=3),
+                          fit='fit_miniBGD', fit_args=(batch_size,))
+                     for lr, max_iter in [(0.5, 100), (1e-2, 1000)] for batch_size in [5, 10]]
+    print("BEGIN: {}-fold cross-validation, multiclass".format(k))
+    print_cv_results(cross_validate(X_all, y_all, multi_configs, k, n_workers))
+    print("END: {}-fold cross-validation, multiclass".format(k))
+
+
+def benchmark_hogwild(n_samples=1000000, max_iter=5, worker_counts=(1, 2, 4, 8, 16, 32)):
+    """Time fit_hogwild against serial fit_SGD on the binary training data
+    tiled to n_samples rows, and print the speedup per number of workers.
+    Worker counts above os.cpu_count() cannot speed up and are skipped.
+
+    Args:
+        n_samples: An integer. Rows to train on.
+        max_iter: An integer. Epochs per fit.
+        worker_counts: A tuple of integers.
+    """
+    raw_data, labels = load_data(os.path.join(data_dir, train_filename))
+    binary = Dataset(prepare_X_cached(raw_data), labels).where(1, 2).relabel({2: -1})
+    repeats = -(-n_samples // len(binary))
+    X = np.tile(binary.X, (repeats, 1))[:n_samples]
+    y = np.tile(binary.y, repeats)[:n_samples]
+
+    print("{} samples, {} epochs, {} CPUs".format(n_samples, max_iter, os.cpu_count()))
+    start = time.perf_counter()
+    serial = logistic_regression(learning_rate=1e-2, max_iter=max_iter).fit_SGD(X, y)
+    serial_time = time.perf_counter() - start
+    print("{:<20s}{:>10.2f}s{:>10s}{:>10.2f}".format('fit_SGD', serial_time, '1.00x', serial.score(X, y)))
+    for n_workers in worker_counts:
+        if n_workers > os.cpu_count():
+            break
+        start = time.perf_counter()
+        model = logistic_regression(learning_rate=1e-2, max_iter=max_iter).fit_hogwild(X, y, n_workers)
+        elapsed = time.perf_counter() - start
+        print("{:<20s}{:>10.2f}s{:>9.2f}x{:>10.2f}".format('hogwild x{}'.format(n_workers), elapsed,
+                                                        serial_time / elapsed, model.score(X, y)))
+
+
 if __name__ == '__main__':
-    main()
+    if '--parallel' in sys.argv:
+        run_study()
+    elif '--cv' in sys.argv:
+        run_cross_validation()
+    elif '--bench-hogwild' in sys.argv:
+        benchmark_hogwild()
+    else:
+        main()
 
 
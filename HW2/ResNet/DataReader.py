@@ -8,25 +8,103 @@ import numpy as np
 def load_data(data_dir):
     """ Load the CIFAR-10 dataset.
 
+    The images are kept as raw uint8 pixels in one contiguous array per split
+    (150 MB for the training set instead of 600 MB as float32). Conversion to
+    float and normalization are done per record by parse_record, only for the
+    batch being served.
+
     Args:
         data_dir: A string. The directory where data batches are stored.
     
     Returns:
         x_train: An numpy array of shape [50000, 3072]. 
-        (dtype=np.float32)
+        (dtype=np.uint8)
         y_train: An numpy array of shape [50000,]. 
         (dtype=np.int32)
         x_test: An numpy array of shape [10000, 3072]. 
-        (dtype=np.float32)
+        (dtype=np.uint8)
         y_test: An numpy array of shape [10000,]. 
         (dtype=np.int32)
     """
     ### YOUR CODE HERE
-
+    x_train, y_train = _load_batches(
+        [os.path.join(data_dir, 'data_batch_%d' % i) for i in range(1, 6)])
+    x_test, y_test = _load_batches([os.path.join(data_dir, 'test_batch')])
     ### YOUR CODE HERE
 
     return x_train, y_train, x_test, y_test
 
+def _load_batches(filenames):
+    """ Read CIFAR-10 pickle batches into one preallocated uint8 array, so at
+        most one batch is held twice while loading.
+
+    Args:
+        filenames: A list of strings. Batch files of equal size.
+
+    Returns:
+        x: An array of shape [n_batches * batch_size, 3072]. (dtype=np.uint8)
+        y: An array of shape [n_batches * batch_size,]. (dtype=np.int32)
+    """
+    x = y = None
+    for i, filename in enumerate(filenames):
+        with open(filename, 'rb') as f:
+            batch = pickle.load(f, encoding='bytes')
+        data = batch[b'data']
+        if x is None:
+            batch_size = data.shape[0]
+            x = np.empty((len(filenames) * batch_size, data.shape[1]), dtype=np.uint8)
+            y = np.empty((len(filenames) * batch_size,), dtype=np.int32)
+        x[i * batch_size:(i + 1) * batch_size] = data
+        y[i * batch_size:(i + 1) * batch_size] = batch[b'labels']
+    return x, y
+
+class BatchSampler(object):
+    """ Yield the row indices of each batch of an epoch, so only the rows of
+        the current batch are gathered instead of a shuffled copy of the
+        whole training set.
+
+    Usage:
+        for batch_index in sampler:
+            x_batch, y_batch = x_train[batch_index], y_train[batch_index]
+    """
+
+    def __init__(self, num_samples, batch_size, shuffle=True, drop_last=True, seed=None):
+        """
+        Args:
+            num_samples: An integer. Number of rows to sample from.
+            batch_size: An integer.
+            shuffle: A boolean. Draw a new permutation every epoch.
+            drop_last: A boolean. Drop the last batch if it is smaller than
+                batch_size; otherwise serve it as a smaller batch.
+            seed: An integer or None. Seed of the permutations; the same seed
+                gives the same batches in every epoch of a new run.
+        """
+        self.num_samples = num_samples
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.rng = np.random.RandomState(seed)
+
+    def __len__(self):
+        """ Number of batches in an epoch. """
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+        return -(-self.num_samples // self.batch_size)
+
+    def __iter__(self):
+        """ Start an epoch.
+
+        Yields:
+            batch_index: An integer array of shape [batch_size,] (the last
+            batch may be smaller if drop_last is False).
+        """
+        if self.shuffle:
+            order = self.rng.permutation(self.num_samples)
+        else:
+            order = np.arange(self.num_samples)
+        for i in range(len(self)):
+            yield order[i * self.batch_size:(i + 1) * self.batch_size]
+
 def train_vaild_split(x_train, y_train, split_index=45000):
     """ Split the original training data into a new training dataset
         and a validation dataset.
@@ -36,6 +114,8 @@ def train_vaild_split(x_train, y_train, split_index=45000):
         y_train: An array of shape [50000,].
         split_index: An integer.
 
+    The returned arrays are views of x_train and y_train; nothing is copied.
+
     Returns:
         x_train_new: An array of shape [split_index, 3072].
         y_train_new: An array of shape [split_index,].
@@ -7,14 +7,16 @@ def parse_record(record, training):
     """ Parse a record to an image and perform data preprocessing.
 
     Args:
-        record: An array of shape [3072,]. One row of the x_* matrix.
+        record: An array of shape [3072,]. One row of the x_* matrix, as
+            uint8 pixels.
         training: A boolean. Determine whether it is in training mode.
 
     Returns:
-        image: An array of shape [3, 32, 32].
+        image: An array of shape [3, 32, 32]. (dtype=np.float32)
     """
-    # Reshape from [depth * height * width] to [depth, height, width].
-    depth_major = record.reshape((3, 32, 32))
+    # Reshape from [depth * height * width] to [depth, height, width], and
+    # convert only this record from uint8 pixels to float.
+    depth_major = record.reshape((3, 32, 32)).astype(np.float32)
 
     # Convert from [depth, height, width] to [height, width, depth]
     image = np.transpose(depth_major, [1, 2, 0])
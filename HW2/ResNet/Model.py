@@ -2,11 +2,11 @@ import os
 import time
 import torch
 import torch.nn as nn
-import numpy as np
 from tqdm import tqdm
 
 from NetWork import ResNet
 from ImageUtils import parse_record
+from DataReader import BatchSampler
 
 """ This script defines the training, validation and testing process.
 """
@@ -28,17 +28,16 @@ class Cifar(nn.Module):
     
     def train(self, x_train, y_train, max_epoch):
         self.network.train()
-        # Determine how many batches in an epoch
+        # Determine how many batches in an epoch. The sampler shuffles row
+        # indices only; each batch gathers its own rows from x_train.
         num_samples = x_train.shape[0]
-        num_batches = num_samples // self.config.batch_size
+        sampler = BatchSampler(num_samples, self.config.batch_size,
+                               drop_last=not self.config.keep_last, seed=self.config.seed)
+        num_batches = len(sampler)
 
         print('### Training... ###')
         for epoch in range(1, max_epoch+1):
             start_time = time.time()
-            # Shuffle
-            shuffle_index = np.random.permutation(num_samples)
-            curr_x_train = x_train[shuffle_index]
-            curr_y_train = y_train[shuffle_index]
 
             ### YOUR CODE HERE
             # Set the learning rate for this epoch
@@ -46,9 +45,9 @@ class Cifar(nn.Module):
             
             ### YOUR CODE HERE
             
-            for i in range(num_batches):
+            for i, batch_index in enumerate(sampler):
                 ### YOUR CODE HERE
-                # Construct the current batch.
+                # Construct the current batch from x_train[batch_index] and y_train[batch_index].
                 # Don't forget to use "parse_record" to perform data preprocessing.
                 # Don't forget L2 weight decay
                 
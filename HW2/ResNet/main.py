@@ -17,6 +17,9 @@ def configure():
                         help='save the checkpoint when epoch MOD save_interval == 0')
     parser.add_argument("--first_num_filters", type=int, default=16, help='number of classes')
     parser.add_argument("--weight_decay", type=float, default=2e-4, help='weight decay rate')
+    parser.add_argument("--seed", type=int, default=None, help='seed of the per-epoch shuffles')
+    parser.add_argument("--keep_last", action='store_true',
+                        help='train on the last, smaller batch of an epoch instead of dropping it')
     parser.add_argument("--modeldir", type=str, default='model_v1', help='model directory')
     ### YOUR CODE HERE
     return parser.parse_args()
@@ -1,11 +1,19 @@
 import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'common'))
+from DigitsStore import open_archive
+from Dataset import Dataset
 
 """This script implements the functions for reading data.
 """
 
 def load_data(filename):
-    """Load a given txt file.
+    """Load a given .npz file.
+
+    The archive is decompressed once into a memory-mapped store (see
+    common/DigitsStore.py); the returned arrays are read-only views of it.
 
     Args:
         filename: A string.
@@ -15,10 +23,8 @@ def load_data(filename):
         labels : An array of shape [n_samples,].
         
     """
-    data= np.load(filename)
-    x= data['x']
-    y= data['y']
-    return x, y
+    data = open_archive(filename)
+    return data['x'], data['y']
 
 def train_valid_split(raw_data, labels, split_index):
 	"""Split the original training data into a new training dataset
@@ -42,11 +48,10 @@ def prepare_y(raw_y):
         y: An array of shape [n_samples,].
         idx:return idx for data label 1 and 5.
     """
+    # Labels are stored as 0,1,2 already, so y is raw_y itself; it may be a
+    # read-only view of the dataset store and must not be written to.
     y = raw_y
     idx = np.where((raw_y==1) | (raw_y==2))
-    y[np.where(raw_y==0)] = 0
-    y[np.where(raw_y==1)] = 1
-    y[np.where(raw_y==2)] = 2
 
     return y, idx
 
@@ -64,36 +69,17 @@ def prepare_data(data_dir, train_filename, test_filename):
                                                                   concatenation of train_X and valid_X, train_y and valid_y.
         test_X, test_y: Arrays of shape [n_test_samples, 256] and [n_test_samples,], data and labels of test set.
     """
-    # Read data for training.
-
-    raw_data, labels = load_data(os.path.join(data_dir, train_filename))
-    raw_train, raw_valid, label_train, label_valid = train_valid_split(
-        raw_data, labels, 2300)
-
-    # Preprocess raw data to extract features
-    train_X_all = raw_train
-    valid_X_all = raw_valid
-    # Preprocess labels for all data to 0,1,2 and return the idx for data from '1' and '2' class.
-    train_y_all, train_idx = prepare_y(label_train)
-    valid_y_all, val_idx = prepare_y(label_valid)
-
-    # For binary case, only use data from '1' and '2'
-    train_X = train_X_all[train_idx]
-    train_y = train_y_all[train_idx]
-    valid_X = valid_X_all[val_idx]
-    valid_y = valid_y_all[val_idx]
-    # set lables to  1 and 0. Here convert label '2' to '0' which means we treat data '1' as postitive class.
-    train_y[np.where(train_y == 2)] = 0
-    valid_y[np.where(valid_y == 2)] = 0
+    # Read data for training. Subsets are lazy views (see common/Dataset.py);
+    # rows are only gathered when X / y is read.
+    data = Dataset(*load_data(os.path.join(data_dir, train_filename)))
+    train_all, valid_all = data[:2300], data[2300:]
 
-    train_valid_X = np.concatenate((train_X, valid_X))
-    train_valid_y = np.concatenate((train_y, valid_y))
+    # For binary case, only use data from '1' and '2'.
+    # set lables to  1 and 0. Here convert label '2' to '0' which means we treat data '1' as postitive class.
+    train = train_all.where(1, 2).relabel({2: 0})
+    valid = valid_all.where(1, 2).relabel({2: 0})
+    train_valid = Dataset.concatenate([train, valid])
 
-    test_data, test_labels = load_data(os.path.join(data_dir, test_filename))
-    test_y_all, test_idx = prepare_y(test_labels)
-    test_X_all = test_data
-    test_y = test_y_all[test_idx]
-    test_y[np.where(test_y == 2)] = 0
-    test_X = test_X_all[test_idx]
+    test = Dataset(*load_data(os.path.join(data_dir, test_filename))).where(1, 2).relabel({2: 0})
 
-    return train_X, train_y, valid_X, valid_y, train_valid_X, train_valid_y, test_X, test_y
\ No newline at end of file
+    return train.X, train.y, valid.X, valid.y, train_valid.X, train_valid.y, test.X, test.y
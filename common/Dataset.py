@@ -0,0 +1,146 @@
+import numpy as np
+
+"""This script implements a lazy view over a (X, y) pair of arrays, shared by
+the HW1_v2 and HW3 kernel DataReaders.
+
+Creating, slicing, filtering by class, relabelling and concatenating datasets
+never copies X or y: a dataset only records which rows of the base arrays it
+holds (a slice, or an array of row indices) and a label mapping. Data is
+gathered when .X / .y is read. A contiguous range of rows is returned as a
+view of the base arrays; any other selection is gathered once and cached, and
+the cache is shared by every relabelled variant of the same rows.
+"""
+
+
+class Dataset(object):
+
+    def __init__(self, X, y, rows=None, label_map=None, _cache=None):
+        """
+        Args:
+            X: An array of shape [n_samples, ...]. The base data, e.g. a
+                memory map returned by load_data.
+            y: An array of shape [n_samples,]. The base labels.
+            rows: None (all rows), a slice with a positive step, or an
+                integer array of row indices into X and y.
+            label_map: A dict mapping raw labels to the labels returned by .y.
+                Labels not in the dict are returned unchanged.
+        """
+        self.base_X = X
+        self.base_y = y
+        self.rows = slice(0, y.shape[0], 1) if rows is None else rows
+        self.label_map = dict(label_map) if label_map else dict()
+        # X, raw labels, class masks and class subsets of these rows; shared
+        # with the relabelled variants, which hold the same rows.
+        self._cache = dict() if _cache is None else _cache
+        self._y = None
+
+    def __len__(self):
+        if isinstance(self.rows, slice):
+            return len(range(*self.rows.indices(self.base_y.shape[0])))
+        return self.rows.shape[0]
+
+    def __getitem__(self, key):
+        """Select rows of the dataset without copying data.
+
+        Args:
+            key: A slice, a boolean mask of shape [len(self),] or an integer
+                array of positions in the dataset.
+
+        Returns:
+            dataset: A Dataset with the same base arrays and label mapping.
+        """
+        if isinstance(key, slice) and isinstance(self.rows, slice):
+            selected = range(*self.rows.indices(self.base_y.shape[0]))[key]
+            if selected.step > 0:
+                rows = slice(selected.start, selected.stop, selected.step)
+            else:
+                rows = np.arange(selected.start, selected.stop, selected.step)
+        else:
+            rows = self.row_indices()[key]
+        subset = Dataset(self.base_X, self.base_y, rows, self.label_map)
+        if isinstance(key, slice):
+            # slices of already gathered arrays are views
+            for name in ('X', 'raw_y'):
+                if name in self._cache:
+                    subset._cache[name] = self._cache[name][key]
+        return subset
+
+    def row_indices(self):
+        """Return the rows of the base arrays held by the dataset, as an
+        integer array."""
+        if isinstance(self.rows, slice):
+            return np.arange(*self.rows.indices(self.base_y.shape[0]))
+        return self.rows
+
+    @property
+    def X(self):
+        """The data of the dataset, of shape [len(self), ...]."""
+        if 'X' not in self._cache:
+            self._cache['X'] = self.base_X[self.rows]
+        return self._cache['X']
+
+    @property
+    def raw_y(self):
+        """The labels of the dataset before the label mapping."""
+        if 'raw_y' not in self._cache:
+            self._cache['raw_y'] = self.base_y[self.rows]
+        return self._cache['raw_y']
+
+    @property
+    def y(self):
+        """The labels of the dataset after the label mapping."""
+        if not self.label_map:
+            return self.raw_y
+        if self._y is None:
+            raw_y = self.raw_y
+            y = np.array(raw_y, dtype=np.result_type(raw_y, *self.label_map.values()))
+            for label, new_label in self.label_map.items():
+                y[self.class_mask(label)] = new_label
+            self._y = y
+        return self._y
+
+    def class_mask(self, label):
+        """Return the cached boolean mask of the rows whose raw label is label."""
+        key = ('mask', label)
+        if key not in self._cache:
+            self._cache[key] = self.raw_y == label
+        return self._cache[key]
+
+    def where(self, *labels):
+        """Return the cached subset of the rows whose raw label is one of
+        labels, e.g. dataset.where(1, 2)."""
+        key = ('where',) + labels
+        if key not in self._cache:
+            mask = np.logical_or.reduce([self.class_mask(label) for label in labels])
+            self._cache[key] = self[mask]
+        subset = self._cache[key]
+        if subset.label_map != self.label_map:
+            subset = Dataset(subset.base_X, subset.base_y, subset.rows, self.label_map, subset._cache)
+        return subset
+
+    def relabel(self, mapping):
+        """Return the same rows with mapping applied on top of the current
+        label mapping, e.g. dataset.relabel({2: -1}). Labels are remapped
+        when .y is read."""
+        label_map = {label: mapping.get(new_label, new_label) for label, new_label in self.label_map.items()}
+        for label, new_label in mapping.items():
+            label_map.setdefault(label, new_label)
+        return Dataset(self.base_X, self.base_y, self.rows, label_map, self._cache)
+
+    @staticmethod
+    def concatenate(datasets):
+        """Concatenate datasets over the same base arrays and label mapping.
+
+        Only the row indices are concatenated; data is gathered on access.
+
+        Returns:
+            dataset: A Dataset holding the rows of each dataset in turn.
+        """
+        first = datasets[0]
+        for dataset in datasets[1:]:
+            if dataset.base_X is not first.base_X or dataset.base_y is not first.base_y:
+                raise ValueError("Can only concatenate datasets over the same base arrays.")
+            if dataset.label_map != first.label_map:
+                raise ValueError("Can only concatenate datasets with the same label mapping.")
+        rows = np.concatenate([dataset.row_indices() for dataset in datasets])
+        return Dataset(first.base_X, first.base_y, rows, first.label_map)
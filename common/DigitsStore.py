@@ -0,0 +1,104 @@
+import os
+import shutil
+import numpy as np
+
+"""This script implements a memory-mapped store for the digits .npz archives
+shared by the HW1_v2 and HW3 kernel DataReaders.
+
+Each archive is converted once into a directory of uncompressed .npy files
+next to it (training.npz -> training.store/). Later loads memory-map those
+files read-only, so no load decompresses or copies the data, and every
+process mapping the same store shares its pages.
+"""
+
+# stores already opened in this process, keyed by absolute archive path
+_opened = dict()
+
+
+def open_archive(filename):
+    """Return the arrays of an .npz archive as read-only memory maps.
+
+    The store is (re)built when it is missing or was built from a different
+    version of the archive (size or modification time changed).
+
+    Args:
+        filename: A string. Path of the .npz archive.
+
+    Returns:
+        arrays: A dict mapping each array name in the archive to a read-only
+            np.memmap.
+    """
+    filename = os.path.abspath(filename)
+    source = os.stat(filename)
+    stamp = "{} {}".format(source.st_size, source.st_mtime_ns)
+    if filename in _opened and _opened[filename][0] == stamp:
+        return _opened[filename][1]
+
+    store_dir = os.path.splitext(filename)[0] + '.store'
+    for attempt in range(2):
+        names = _read_stamp(store_dir, stamp)
+        if names is None:
+            names = _convert(filename, store_dir, stamp)
+        try:
+            arrays = {name: np.load(os.path.join(store_dir, name + '.npy'), mmap_mode='r') for name in names}
+            break
+        except FileNotFoundError:
+            # another process swapped the store between the check and the load
+            if attempt:
+                raise
+    _opened[filename] = (stamp, arrays)
+    return arrays
+
+
+def _read_stamp(store_dir, stamp):
+    """Return the array names of a store built from the archive version
+    stamp, or None if the store is missing or stale."""
+    try:
+        with open(os.path.join(store_dir, 'SOURCE')) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    if len(lines) != 2 or lines[0] != stamp:
+        return None
+    return lines[1].split()
+
+
+def _convert(filename, store_dir, stamp):
+    """Decompress every array of the archive into store_dir as .npy files.
+
+    The store is written to a temporary directory and renamed into place, so
+    a concurrent reader never sees a partial store. If another process
+    installed a current store in the meantime, that one is kept; a stale
+    store is renamed aside before it is removed, never deleted in place.
+
+    Returns:
+        names: A list of the array names.
+    """
+    tmp_dir = "{}.{}.tmp".format(store_dir, os.getpid())
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    with np.load(filename) as data:
+        names = list(data.files)
+        for name in names:
+            np.save(os.path.join(tmp_dir, name + '.npy'), data[name])
+    with open(os.path.join(tmp_dir, 'SOURCE'), 'w') as f:
+        f.write("{}\n{}\n".format(stamp, ' '.join(names)))
+
+    if _read_stamp(store_dir, stamp) is not None:
+        # another process installed a current store first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return names
+    if os.path.exists(store_dir):
+        stale_dir = "{}.{}.stale".format(store_dir, os.getpid())
+        try:
+            os.rename(store_dir, stale_dir)
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        except OSError:
+            # another process moved it aside first
+            pass
+    try:
+        os.rename(tmp_dir, store_dir)
+    except OSError:
+        # another process installed the store first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return names